@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from serialization import encode_alert_batch
+
+logger = logging.getLogger(__name__)
+
+START_PRICES = {
+    "AAPL": 150.00,
+    "GOOGL": 2800.00,
+    "MSFT": 380.00,
+    "TSLA": 200.00
+}
+POLICIES = ("drop_oldest", "coalesce")
+
+
+def make_alert(ticker: str, price: float, change_percent: float, timestamp: Optional[datetime] = None) -> dict:
+    return {
+        "ticker": ticker,
+        "price": price,
+        "change_percent": round(change_percent * 100, 2),
+        "timestamp": (timestamp or datetime.utcnow()).isoformat()
+    }
+
+
+def random_walk_quotes(last_prices: Dict[str, float]) -> Tuple[List[str], List[float]]:
+    """Move every price by up to +/-3% and return the new quotes as (tickers, prices)."""
+    for ticker, price in last_prices.items():
+        last_prices[ticker] = round(price * (1 + random.uniform(-0.03, 0.03)), 2)
+    return list(last_prices), list(last_prices.values())
+
+
+class LatencyRecorder:
+    """Latencies of the last ``size`` deliveries, summarized as percentiles in milliseconds."""
+
+    def __init__(self, size: int = 10000):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def reset(self):
+        self._samples.clear()
+        self.count = 0
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+
+        def percentile(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+
+        return {"count": self.count, "p50": percentile(0.5), "p95": percentile(0.95),
+                "p99": percentile(0.99), "max": round(samples[-1] * 1000, 3)}
+
+
+class AlertBatch:
+    """Alerts queued for delivery; the ``/ws`` message is encoded once, for every subscriber sharing the batch."""
+
+    __slots__ = ("alerts", "_message")
+
+    def __init__(self, alerts: List[dict]):
+        self.alerts = alerts
+        self._message: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def message(self) -> str:
+        if self._message is None:
+            self._message = encode_alert_batch(self.alerts)
+        return self._message
+
+
+class Subscriber:
+    """Bounded per-connection queue of alert batches.
+
+    When ``maxsize`` batches are waiting, ``drop_oldest`` discards the oldest
+    batch and ``coalesce`` merges the new alerts into the newest queued batch,
+    keeping only the latest alert per ticker. Either way a slow client costs
+    bounded memory and never slows down the producer. Alerts of different
+    rules on the same ticker are never merged. Every batch keeps the
+    ``time.perf_counter()`` of the tick that produced it (the oldest one for
+    a coalesced batch) so the sender can measure tick-to-send latency.
+    """
+
+    def __init__(self, tickers: Optional[Iterable[str]] = None, maxsize: int = 100, policy: str = "coalesce",
+                 subscriber_id: int = 0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.id = subscriber_id
+        # Subscribers with their own alert rules get only those rules' alerts
+        self.custom_rules = False
+        self.tickers: Optional[Set[str]] = set(tickers) if tickers else None
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._batches = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, alerts, created: Optional[float] = None):
+        """Queue ``alerts`` (a list or an ``AlertBatch`` shared with other subscribers)."""
+        batch = alerts if isinstance(alerts, AlertBatch) else AlertBatch(alerts)
+        if created is None:
+            created = time.perf_counter()
+        if len(self._batches) >= self.maxsize:
+            if self.policy == "drop_oldest":
+                self.dropped += len(self._batches.popleft()[1])
+            else:
+                queued_at, queued = self._batches[-1]
+                merged = {(a["ticker"], a.get("rule_id")): a for a in queued.alerts}
+                self.dropped += sum(1 for a in batch.alerts if (a["ticker"], a.get("rule_id")) in merged)
+                merged.update(((a["ticker"], a.get("rule_id")), a) for a in batch.alerts)
+                self._batches[-1] = (queued_at, AlertBatch(list(merged.values())))
+                return
+        self._batches.append((created, batch))
+        self._ready.set()
+
+    async def get_batch(self) -> Tuple[float, AlertBatch]:
+        """Next ``(created, batch)``, waiting for one if the queue is empty."""
+        while not self._batches:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._batches.popleft()
+
+    async def get(self) -> List[dict]:
+        return (await self.get_batch())[1].alerts
+
+    def qsize(self) -> int:
+        return len(self._batches)
+
+
+class AlertHub:
+    """In-process pub/sub for price alerts.
+
+    One producer task generates ticks for the whole process, hands each batch
+    of alerts to ``on_alerts`` once (e.g. to store it) and fans it out to the
+    subscribers of the alerted tickers. Alerts with a ``subscriber`` id (from
+    that subscriber's own rules) go to that subscriber only. Subscribers that
+    get the same alerts share one ``AlertBatch``, so its message is encoded
+    once. Senders report tick-to-send times to ``latency``.
+    """
+
+    def __init__(self, queue_size: int = 100, policy: str = "coalesce"):
+        self.queue_size = queue_size
+        self.policy = policy
+        self._by_ticker: Dict[str, Set[Subscriber]] = {}
+        self._all: Set[Subscriber] = set()
+        self._members: Dict[int, Subscriber] = {}
+        self._next_id = 1
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.latency = LatencyRecorder()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._members)
+
+    def queued(self) -> int:
+        """Batches waiting in all subscriber queues."""
+        return sum(subscriber.qsize() for subscriber in list(self._members.values()))
+
+    def subscribe(self, tickers: Optional[Iterable[str]] = None) -> Subscriber:
+        subscriber = Subscriber(tickers, self.queue_size, self.policy, self._next_id)
+        self._next_id += 1
+        self._members[subscriber.id] = subscriber
+        self._index(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._members.pop(subscriber.id, None)
+        self._unindex(subscriber)
+
+    def set_custom_rules(self, subscriber: Subscriber, custom: bool):
+        """Switch ``subscriber`` between the shared alert feed and its own rules only."""
+        self._unindex(subscriber)
+        subscriber.custom_rules = custom
+        self._index(subscriber)
+
+    def update(self, subscriber: Subscriber, tickers: Optional[Iterable[str]]):
+        self._unindex(subscriber)
+        subscriber.tickers = set(tickers) if tickers else None
+        self._index(subscriber)
+
+    def _unindex(self, subscriber: Subscriber):
+        self._all.discard(subscriber)
+        for ticker in subscriber.tickers or ():
+            subs = self._by_ticker.get(ticker)
+            if subs is not None:
+                subs.discard(subscriber)
+                if not subs:
+                    del self._by_ticker[ticker]
+
+    def _index(self, subscriber: Subscriber):
+        if subscriber.custom_rules:
+            return
+        if subscriber.tickers is None:
+            self._all.add(subscriber)
+        else:
+            for ticker in subscriber.tickers:
+                self._by_ticker.setdefault(ticker, set()).add(subscriber)
+
+    def publish(self, alerts: List[dict], created: Optional[float] = None):
+        """Fan ``alerts`` out; ``created`` is the ``perf_counter()`` of the tick (default now)."""
+        if not alerts:
+            return
+        if created is None:
+            created = time.perf_counter()
+        self.published += len(alerts)
+        own: Dict[Subscriber, List[dict]] = {}
+        shared = alerts
+        if any("subscriber" in alert for alert in alerts):
+            shared = []
+            for alert in alerts:
+                owner = alert.get("subscriber")
+                if owner is None:
+                    shared.append(alert)
+                elif owner in self._members:
+                    own.setdefault(self._members[owner], []).append(alert)
+        # Ticker subscribers are grouped by the alerts they get, one batch per group
+        selected: Dict[Subscriber, List[int]] = {}
+        for i, alert in enumerate(shared):
+            for subscriber in self._by_ticker.get(alert["ticker"], ()):
+                selected.setdefault(subscriber, []).append(i)
+        groups: Dict[tuple, AlertBatch] = {}
+        for subscriber, rows in selected.items():
+            key = tuple(rows)
+            batch = groups.get(key)
+            if batch is None:
+                batch = groups[key] = AlertBatch(shared if len(rows) == len(shared) else [shared[i] for i in rows])
+            subscriber.offer(batch, created)
+        if shared and self._all:
+            batch = groups.get(tuple(range(len(shared)))) or AlertBatch(shared)
+            for subscriber in self._all:
+                subscriber.offer(batch, created)
+        for subscriber, batch in own.items():
+            subscriber.offer(batch, created)
+
+    def start(self, tick: Callable[[], List[dict]], interval: float,
+              on_alerts: Optional[Callable[[List[dict]], Awaitable[None]]] = None):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._produce(tick, interval, on_alerts))
+
+    def start_source(self, source: Awaitable[None]):
+        """Run ``source`` (e.g. ``Replayer.run(hub)``) as the producer instead of interval ticks."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(source)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _produce(self, tick, interval, on_alerts):
+        while True:
+            await asyncio.sleep(interval)
+            if not self.subscriber_count:
+                continue
+            try:
+                alerts = tick()
+                if alerts and on_alerts is not None:
+                    await on_alerts(alerts)
+                self.publish(alerts)
+            except Exception as e:
+                logger.error(f"Alert producer error: {e}")
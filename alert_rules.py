@@ -0,0 +1,601 @@
+"""Price alert rules evaluated over whole tick batches.
+
+A tick is a batch of quotes (ticker, price and optionally volume), one per
+ticker. ``RuleEngine`` keeps per-ticker state in arrays indexed by an
+interned ticker code (last price, a ring of recent prices with running sums
+for the SMA windows in use, average volumes) and stores every rule type as
+parallel arrays of ticker codes and parameters, so a tick is checked
+against all rules with a handful of array gathers and comparisons.
+
+Rule types (``ticker`` omitted or null means every ticker):
+
+- ``percent_move``: ``{"percent": 2}``: price moved at least that many
+  percent since the ticker's previous quote.
+- ``price_cross``: ``{"ticker": "AAPL", "level": 200}``: price crossed the
+  level.
+- ``sma_cross``: ``{"fast": 50, "slow": 200, "cooldown_days": 5}``: the
+  fast SMA of the quotes crossed the slow one. This is the same test as
+  ``backtest.crossover_candidates``, and a crossover less than
+  ``cooldown_days`` (default 0) after the rule's last signal on the ticker is
+  skipped, as in ``backtest.backtest``. Both SMAs are updated in O(1) per
+  quote whatever their length.
+- ``volume_spike``: ``{"multiple": 3, "window": 20}``: the quote's volume is
+  at least ``multiple`` times the average volume of the ticker's previous
+  ``window`` quotes.
+
+``percent_move``, ``price_cross`` and ``sma_cross`` take ``"direction":
+"up" | "down" | "both"`` (default both). Rules with a ``subscriber`` id
+belong to that /ws subscriber; their alerts carry the id and are delivered
+to that subscriber only.
+"""
+import logging
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RULE_TYPES = ("percent_move", "price_cross", "sma_cross", "volume_spike")
+DIRECTIONS = ("both", "up", "down")
+DEFAULT_RULES = [{"type": "percent_move", "percent": 2.0}]
+# Fields of a ``match`` result that every alert has in another form
+FIRED_FIELDS = ("type", "rule_id", "subscriber", "code", "price", "change", "time")
+# The price ring is as wide as the largest SMA window in use
+MAX_SMA_WINDOW = 10000
+ONE_DAY = np.timedelta64(1, "D")
+
+
+def _number(spec: dict, name: str, minimum: float = 0.0, integer: bool = False):
+    value = spec.get(name)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{spec.get('type')} rule needs a numeric {name!r}")
+    if value <= minimum or (integer and int(value) != value):
+        raise ValueError(f"{name!r} must be {'an integer ' if integer else ''}greater than {minimum:g}")
+    return int(value) if integer else float(value)
+
+
+def make_rule(spec: dict, subscriber: Optional[int] = None) -> dict:
+    """Validate a rule spec and return it normalized; raises ValueError."""
+    if not isinstance(spec, dict):
+        raise ValueError("A rule must be an object")
+    kind = spec.get("type")
+    if kind not in RULE_TYPES:
+        raise ValueError(f"Unknown rule type {kind!r}, expected one of {', '.join(RULE_TYPES)}")
+    ticker = spec.get("ticker")
+    if ticker is not None:
+        if not isinstance(ticker, str) or not ticker.strip():
+            raise ValueError("'ticker' must be a non-empty string")
+        ticker = ticker.strip().upper()
+    rule = {"type": kind, "ticker": ticker}
+    if kind != "volume_spike":
+        direction = spec.get("direction", "both")
+        if direction not in DIRECTIONS:
+            raise ValueError(f"'direction' must be one of {', '.join(DIRECTIONS)}")
+        rule["direction"] = direction
+    if kind == "percent_move":
+        rule["percent"] = _number(spec, "percent")
+    elif kind == "price_cross":
+        if ticker is None:
+            raise ValueError("price_cross rules need a ticker")
+        rule["level"] = _number(spec, "level")
+    elif kind == "sma_cross":
+        rule["fast"] = _number(spec, "fast", integer=True)
+        rule["slow"] = _number(spec, "slow", integer=True)
+        if rule["fast"] >= rule["slow"]:
+            raise ValueError("'fast' must be smaller than 'slow'")
+        if rule["slow"] > MAX_SMA_WINDOW:
+            raise ValueError(f"'slow' must be at most {MAX_SMA_WINDOW}")
+        cooldown = spec.get("cooldown_days", 0)
+        if isinstance(cooldown, bool) or not isinstance(cooldown, int) or cooldown < 0:
+            raise ValueError("'cooldown_days' must be a non-negative integer")
+        rule["cooldown_days"] = cooldown
+    else:
+        rule["multiple"] = _number(spec, "multiple")
+        rule["window"] = _number(spec, "window", integer=True)
+    if subscriber is not None:
+        rule["subscriber"] = subscriber
+    return rule
+
+
+class RuleEngine:
+    """Vectorized evaluation of alert rules over tick batches.
+
+    ``match`` updates the ticker state with one tick and returns the
+    triggered (rule, quote) pairs as arrays; ``evaluate`` turns them into
+    alert dicts. Every triggered rule produces an alert. Not thread-safe:
+    use it from one thread (the event loop).
+    """
+
+    def __init__(self, rules: Optional[Iterable[dict]] = None, max_subscriber_rules: Optional[int] = None,
+                 max_subscriber_window: Optional[int] = None):
+        # Limits on what one subscriber can register (None for no limit); windows are SMA and volume lengths
+        self.max_subscriber_rules = max_subscriber_rules
+        self.max_subscriber_window = max_subscriber_window
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._rules: Dict[int, dict] = {}
+        self._next_id = 1
+        self._compiled: Optional[List[dict]] = None
+        self._sma_windows: List[int] = []
+        self._volume_windows: List[int] = []
+        self._reset_state(0)
+        for rule in rules or ():
+            self.add(rule)
+
+    # Tickers and per-ticker state
+
+    def _reset_state(self, capacity: int):
+        self._capacity = capacity
+        self._last = np.full(capacity, np.nan)
+        self._seen = np.zeros(capacity, dtype=np.int64)
+        self._position = np.full(capacity, -1, dtype=np.int64)
+        width = max(self._sma_windows, default=0)
+        self._ring = np.zeros((capacity, width))
+        self._sums = {w: np.zeros(capacity) for w in self._sma_windows}
+        self._sma_start = {w: np.zeros(capacity, dtype=np.int64) for w in self._sma_windows}
+        self._volume_seen = np.zeros(capacity, dtype=np.int64)
+        self._volume_avgs = {w: np.zeros(capacity) for w in self._volume_windows}
+        # (rule id, ticker code) -> time of the last signal, for SMA cooldowns
+        self._last_signal: Dict[tuple, np.datetime64] = {}
+
+    def reset(self):
+        """Forget all prices and volumes seen so far (rules are kept)."""
+        self._reset_state(self._capacity)
+
+    def _grow(self, capacity: int):
+        capacity = max(capacity, 2 * self._capacity, 64)
+
+        def grown(array: np.ndarray, fill) -> np.ndarray:
+            out = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            out[:len(array)] = array
+            return out
+
+        self._last = grown(self._last, np.nan)
+        self._seen = grown(self._seen, 0)
+        self._position = grown(self._position, -1)
+        self._ring = grown(self._ring, 0.0)
+        self._sums = {w: grown(s, 0.0) for w, s in self._sums.items()}
+        self._sma_start = {w: grown(s, 0) for w, s in self._sma_start.items()}
+        self._volume_seen = grown(self._volume_seen, 0)
+        self._volume_avgs = {w: grown(a, 0.0) for w, a in self._volume_avgs.items()}
+        self._capacity = capacity
+
+    def ticker_codes(self, tickers: Iterable[str]) -> np.ndarray:
+        """Interned codes of ``tickers``, assigning codes to new ones."""
+        codes = []
+        for ticker in tickers:
+            code = self._codes.get(ticker)
+            if code is None:
+                code = self._codes[ticker] = len(self._names)
+                self._names.append(ticker)
+            codes.append(code)
+        if len(self._names) > self._capacity:
+            self._grow(len(self._names))
+        return np.array(codes, dtype=np.int64)
+
+    def _resize_ring(self, width: int):
+        """Re-lay the price ring for a new largest SMA window, keeping the last prices that still fit."""
+        old = self._ring
+        old_width = old.shape[1]
+        kept = min(old_width, width)
+        ring = np.zeros((self._capacity, width))
+        if kept:
+            seq = self._seen[:, None] - kept + np.arange(kept)
+            valid = seq >= 0
+            rows = np.nonzero(valid)[0]
+            ring[rows, seq[valid] % width] = old[rows, seq[valid] % old_width]
+        self._ring = ring
+
+    def _add_sma_window(self, window: int):
+        if window in self._sums:
+            return
+        # The window starts from the prices the ring still holds; ``_sma_start`` is the
+        # sequence number of the first price in its running sum
+        held = np.minimum(self._seen, min(window, self._ring.shape[1]))
+        if window > self._ring.shape[1]:
+            self._resize_ring(window)
+        width = self._ring.shape[1]
+        ages = np.arange(window)
+        seq = self._seen[:, None] - 1 - ages
+        values = self._ring[np.arange(self._capacity)[:, None], seq % width] if width else np.zeros(seq.shape)
+        self._sums[window] = np.where(ages < held[:, None], values, 0.0).sum(axis=1)
+        self._sma_start[window] = self._seen - held
+        self._sma_windows.append(window)
+
+    def _add_volume_window(self, window: int):
+        if window not in self._volume_avgs:
+            self._volume_avgs[window] = np.zeros(self._capacity)
+            self._volume_windows.append(window)
+
+    def _prune_windows(self):
+        """Drop the SMA and volume windows no rule uses any more, shrinking the price ring to the largest left."""
+        sma = {rule[side] for rule in self._rules.values() if rule["type"] == "sma_cross" for side in ("fast", "slow")}
+        volume = {rule["window"] for rule in self._rules.values() if rule["type"] == "volume_spike"}
+        for window in [w for w in self._sma_windows if w not in sma]:
+            self._sma_windows.remove(window)
+            del self._sums[window], self._sma_start[window]
+        for window in [w for w in self._volume_windows if w not in volume]:
+            self._volume_windows.remove(window)
+            del self._volume_avgs[window]
+        width = max(self._sma_windows, default=0)
+        if width < self._ring.shape[1]:
+            self._resize_ring(width)
+
+    # Rules
+
+    def add(self, spec: dict, subscriber: Optional[int] = None) -> dict:
+        rule = make_rule(spec, subscriber)
+        rule["id"] = self._next_id
+        self._next_id += 1
+        if rule["type"] == "sma_cross":
+            self._add_sma_window(rule["fast"])
+            self._add_sma_window(rule["slow"])
+        elif rule["type"] == "volume_spike":
+            self._add_volume_window(rule["window"])
+        if rule["ticker"] is not None:
+            self.ticker_codes([rule["ticker"]])
+        self._rules[rule["id"]] = rule
+        self._compiled = None
+        return rule
+
+    def remove(self, rule_id: int) -> bool:
+        if self._rules.pop(rule_id, None) is None:
+            return False
+        self._forget_signals({rule_id})
+        self._prune_windows()
+        self._compiled = None
+        return True
+
+    def _forget_signals(self, rule_ids):
+        if self._last_signal:
+            self._last_signal = {key: t for key, t in self._last_signal.items() if key[0] not in rule_ids}
+
+    def replace_subscriber_rules(self, subscriber: int, specs: Sequence[dict]) -> List[dict]:
+        """Validate ``specs`` and make them the only rules of ``subscriber``.
+
+        Raises ValueError past ``max_subscriber_rules`` rules, for windows
+        longer than ``max_subscriber_window`` and for tickers the engine does
+        not know yet (quoted or named by a shared rule): per-ticker state is
+        never released, so subscribers cannot add tickers.
+        """
+        if self.max_subscriber_rules is not None and len(specs) > self.max_subscriber_rules:
+            raise ValueError(f"At most {self.max_subscriber_rules} rules per subscriber")
+        for spec in specs:
+            rule = make_rule(spec)
+            if rule["ticker"] is not None and rule["ticker"] not in self._codes:
+                raise ValueError(f"Unknown ticker {rule['ticker']!r}")
+            window = rule.get("slow", rule.get("window"))
+            if self.max_subscriber_window is not None and window is not None and window > self.max_subscriber_window:
+                raise ValueError(f"Subscriber rule windows must be at most {self.max_subscriber_window}")
+        # Windows shared by the old and new rules keep their state: prune only once the new rules are in
+        self._drop_subscriber_rules(subscriber)
+        rules = [self.add(spec, subscriber) for spec in specs]
+        self._prune_windows()
+        return rules
+
+    def remove_subscriber(self, subscriber: int):
+        if self._drop_subscriber_rules(subscriber):
+            self._prune_windows()
+
+    def _drop_subscriber_rules(self, subscriber: int) -> bool:
+        owned = [rule_id for rule_id, rule in self._rules.items() if rule.get("subscriber") == subscriber]
+        for rule_id in owned:
+            del self._rules[rule_id]
+        if owned:
+            self._forget_signals(set(owned))
+            self._compiled = None
+        return bool(owned)
+
+    def rules(self, subscriber: Optional[int] = None) -> List[dict]:
+        return [dict(rule) for rule in self._rules.values() if rule.get("subscriber") == subscriber]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def _compile(self) -> List[dict]:
+        """Rules grouped by type (and by window for SMA and volume rules) as parallel arrays.
+
+        Rules with a ticker come first, sorted by ticker code; ``specific``
+        is their count. The direction is folded into ``slot``, the rule's
+        index into per-ticker tables with one entry per direction
+        (``ticker * 3 + DIRECTIONS.index(direction)``), so a check is a
+        gather plus at most one comparison per bound.
+        """
+        groups: Dict[tuple, List[dict]] = {}
+        for rule in self._rules.values():
+            kind = rule["type"]
+            key = (kind, rule["fast"], rule["slow"]) if kind == "sma_cross" else \
+                (kind, rule["window"]) if kind == "volume_spike" else (kind,)
+            groups.setdefault(key, []).append(rule)
+        compiled = []
+        for key, rules in groups.items():
+            kind = key[0]
+            tickers = np.array([self._codes[r["ticker"]] if r["ticker"] is not None else -1 for r in rules],
+                               dtype=np.int64)
+            order = np.argsort(np.where(tickers < 0, np.iinfo(np.int64).max, tickers), kind="stable")
+            rules = [rules[k] for k in order]
+            direction = np.array([DIRECTIONS.index(r.get("direction", "both")) for r in rules], dtype=np.int64)
+            group = {
+                "type": kind,
+                "key": key[1:],
+                "specific": int((tickers >= 0).sum()),
+                "ticker": tickers[order],
+                "id": np.array([r["id"] for r in rules], dtype=np.int64),
+                "subscriber": np.array([r.get("subscriber", -1) for r in rules], dtype=np.int64),
+            }
+            if kind == "volume_spike":
+                group["slot"] = group["ticker"]
+                group["multiple"] = np.array([r["multiple"] for r in rules])
+            else:
+                group["direction"] = direction
+                group["slot"] = group["ticker"] * len(DIRECTIONS) + direction
+            if kind == "percent_move":
+                group["threshold"] = np.array([r["percent"] / 100 for r in rules])
+            elif kind == "price_cross":
+                group["level"] = np.array([r["level"] for r in rules])
+            elif kind == "sma_cross":
+                group["cooldown"] = np.array([r["cooldown_days"] for r in rules], dtype=np.int64)
+            compiled.append(group)
+        self._compiled = compiled
+        return compiled
+
+    # Evaluation
+
+    def match(self, tickers, prices, volumes=None, timestamps=None) -> List[dict]:
+        """Apply one tick and return the triggered rules as dicts of parallel arrays.
+
+        Each dict has the rule ``type`` and arrays ``rule_id``, ``subscriber``
+        (-1 for global rules), ``code``, ``price``, ``change`` and ``time``
+        (``datetime64[us]``) of the quote, plus the type's details
+        (``level``, ``signal``/``fast_sma``/``slow_sma`` or
+        ``volume``/``average_volume``).
+
+        ``tickers`` are ticker names or codes from ``ticker_codes``; a ticker
+        quoted more than once in a tick is evaluated once per quote, in order.
+        ``timestamps`` is one datetime for the tick or one per quote (default
+        now). Quotes without a finite positive price are ignored.
+        """
+        codes = tickers if isinstance(tickers, np.ndarray) and tickers.dtype.kind in "iu" \
+            else self.ticker_codes(tickers)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = None if volumes is None else np.asarray(volumes, dtype=np.float64)
+        if timestamps is None or isinstance(timestamps, (datetime, np.datetime64)):
+            times = np.full(len(codes), np.datetime64(timestamps or datetime.utcnow(), "us"))
+        else:
+            times = np.asarray(timestamps, dtype="datetime64[us]")
+        valid = np.isfinite(prices) & (prices > 0)
+        if not valid.all():
+            keep = np.flatnonzero(valid)
+            codes, prices, times = codes[keep], prices[keep], times[keep]
+            volumes = None if volumes is None else volumes[keep]
+        if not len(codes):
+            return []
+        if np.bincount(codes).max() > 1:
+            return self._match_repeated(codes, prices, volumes, times)
+        return self._match_unique(codes, prices, volumes, times)
+
+    def _match_repeated(self, codes, prices, volumes, times):
+        # Split into rounds in which every ticker appears once: the k-th quote of each ticker goes in round k
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_codes[1:] != sorted_codes[:-1])))
+        rank = np.empty(len(codes), dtype=np.int64)
+        rank[order] = np.arange(len(codes)) - np.repeat(starts, np.diff(np.append(starts, len(codes))))
+        fired = []
+        for k in range(rank.max() + 1):
+            rows = np.flatnonzero(rank == k)
+            fired.extend(self._match_unique(codes[rows], prices[rows], None if volumes is None else volumes[rows],
+                                            times[rows]))
+        return fired
+
+    def _update(self, codes, prices, volumes):
+        """Fold one tick into the ticker state; returns the per-quote values the rules look at."""
+        previous = self._last[codes]
+        seen = self._seen[codes]
+        state = {"previous": previous, "sma_before": {}, "sma_after": {}, "volume_before": {}}
+        if self._sma_windows:
+            width = self._ring.shape[1]
+            ring = self._ring.reshape(-1)
+            row = codes * width
+            for window in self._sma_windows:
+                sums = self._sums[window]
+                counted = seen - self._sma_start[window][codes]
+                full = counted >= window
+                before = sums[codes]
+                leaving = ring.take(row + (seen - window) % width)
+                after = before + prices - np.where(full, leaving, 0.0)
+                sums[codes] = after
+                state["sma_before"][window] = np.where(full, before, np.nan) / window
+                state["sma_after"][window] = np.where(counted + 1 >= window, after, np.nan) / window
+            ring[row + seen % width] = prices
+        self._seen[codes] = seen + 1
+        self._last[codes] = prices
+
+        if volumes is not None and self._volume_windows:
+            has_volume = np.isfinite(volumes)
+            volume_seen = self._volume_seen[codes]
+            known = np.where(has_volume, volumes, 0.0)
+            for window in self._volume_windows:
+                averages = self._volume_avgs[window]
+                before = averages[codes]
+                state["volume_before"][window] = np.where(has_volume & (volume_seen >= window), before, np.nan)
+                # Exponential average with the span of ``window`` quotes; a plain mean until it is warm
+                weight = np.where(has_volume, np.maximum(2.0 / (window + 1), 1.0 / (volume_seen + 1)), 0.0)
+                averages[codes] = before + weight * (known - before)
+            self._volume_seen[codes] = volume_seen + has_volume
+        return state
+
+    def _by_ticker(self, codes, values, fill=np.nan, dense: bool = False) -> np.ndarray:
+        """Spread per-quote ``values`` over the ticker code space; unquoted tickers get ``fill``.
+
+        ``dense`` ticks quote every known ticker in code order, so ``values`` already are by ticker.
+        """
+        if dense:
+            return values
+        out = np.full(self._capacity, fill, dtype=np.asarray(values).dtype)
+        out[codes] = values
+        return out
+
+    @staticmethod
+    def _by_direction(*columns) -> np.ndarray:
+        """Interleave per-ticker ``columns`` in ``DIRECTIONS`` order, as gathered by a rule's ``slot``."""
+        table = np.empty((len(columns[0]), len(columns)), dtype=columns[0].dtype)
+        for k, column in enumerate(columns):
+            table[:, k] = column
+        return table.reshape(-1)
+
+    def _match_unique(self, codes, prices, volumes, times):
+        compiled = self._compiled if self._compiled is not None else self._compile()
+        state = self._update(codes, prices, volumes)
+        previous = state["previous"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = (prices - previous) / previous
+        # Per-ticker tables for the rules to gather, one column per direction (see _compile);
+        # NaN for tickers not in this tick never fires
+        values = {}
+        kinds = {group["type"] for group in compiled}
+        dense = len(codes) == len(self._names) and bool((codes == np.arange(len(codes))).all())
+        if "percent_move" in kinds:
+            moved = self._by_ticker(codes, change, dense=dense)
+            values["change"] = self._by_direction(np.abs(moved), moved, -moved)
+        if "price_cross" in kinds:
+            # Crossing levels lie in (low, high]: up is (before, after], down is [after, before)
+            before = self._by_ticker(codes, previous, dense=dense)
+            after = self._by_ticker(codes, prices, dense=dense)
+            # The next float down, by bit pattern (prices are positive): x <= L is x' < L
+            below_after = (after.view(np.int64) - 1).view(np.float64)
+            below_before = (before.view(np.int64) - 1).view(np.float64)
+            rising = after >= before
+            values["low"] = self._by_direction(np.where(rising, before, below_after), before, below_after)
+            values["high"] = self._by_direction(np.where(rising, after, below_before), after, below_before)
+
+        # Where each ticker's quote sits in this tick; dense ticks already are in ticker order
+        position = self._position
+        if not dense:
+            position[codes] = np.arange(len(codes))
+        fired = []
+        try:
+            for group in compiled:
+                kind = group["type"]
+                if kind == "sma_cross":
+                    fast, slow = group["key"]
+                    before = state["sma_before"][fast] - state["sma_before"][slow]
+                    after = state["sma_after"][fast] - state["sma_after"][slow]
+                    # NaN comparisons are False, so SMAs without a full window never fire
+                    up = self._by_ticker(codes, (before < 0) & (after > 0), False, dense)
+                    down = self._by_ticker(codes, (before > 0) & (after < 0), False, dense)
+                    values["cross"] = self._by_direction(up | down, up, down)
+                elif kind == "volume_spike":
+                    if volumes is None:
+                        continue
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        ratio = volumes / state["volume_before"][group["key"][0]]
+                    values["ratio"] = self._by_ticker(codes, ratio, dense=dense)
+
+                specific = group["specific"]
+                rows = np.flatnonzero(self._check(kind, group, slice(0, specific), group["slot"][:specific], values))
+                rule_rows, tickers = rows, group["ticker"].take(rows)
+                if len(group["id"]) > specific:
+                    # Rules without a ticker against every quote, as a (rule, quote) grid
+                    every = np.arange(specific, len(group["id"]))[:, None]
+                    slots = codes if kind == "volume_spike" else codes * len(DIRECTIONS) + group["direction"][every]
+                    rule_hits, quote_hits = np.nonzero(self._check(kind, group, every, slots, values))
+                    rule_rows = np.concatenate((rule_rows, specific + rule_hits))
+                    tickers = np.concatenate((tickers, codes[quote_hits]))
+                if kind == "sma_cross" and len(rule_rows):
+                    quotes = tickers if dense else position.take(tickers)
+                    rule_rows, tickers = self._cool_down(group, rule_rows, tickers, times.take(quotes))
+                if len(rule_rows):
+                    fired.append(self._fired(group, rule_rows, tickers, tickers if dense else position.take(tickers),
+                                             prices, change, state, volumes, times))
+        finally:
+            if not dense:
+                position[codes] = -1
+        return fired
+
+    @staticmethod
+    def _check(kind: str, group: dict, rows, slots: np.ndarray, values: dict) -> np.ndarray:
+        """Which of the rules ``rows`` of ``group`` fire, given their ``slots`` in the per-ticker tables."""
+        # take() is a faster gather than fancy indexing
+        if kind == "percent_move":
+            return values["change"].take(slots) >= group["threshold"][rows]
+        if kind == "price_cross":
+            level = group["level"][rows]
+            return (values["low"].take(slots) < level) & (level <= values["high"].take(slots))
+        if kind == "sma_cross":
+            return values["cross"].take(slots)
+        return values["ratio"].take(slots) >= group["multiple"][rows]
+
+    def _cool_down(self, group: dict, rule_rows: np.ndarray, tickers: np.ndarray, times: np.ndarray):
+        """Drop crossovers less than the rule's ``cooldown_days`` after its last signal on the ticker."""
+        cooldown = group["cooldown"][rule_rows]
+        if not cooldown.any():
+            return rule_rows, tickers
+        keep = []
+        last_signal = self._last_signal
+        for k, (rule_id, code, days, when) in enumerate(zip(group["id"][rule_rows].tolist(), tickers.tolist(),
+                                                            cooldown.tolist(), times)):
+            if days:
+                last = last_signal.get((rule_id, code))
+                if last is not None and (when - last) // ONE_DAY < days:
+                    continue
+                last_signal[(rule_id, code)] = when
+            keep.append(k)
+        return rule_rows[keep], tickers[keep]
+
+    @staticmethod
+    def _fired(group, rule_rows, tickers, quote_rows, prices, change, state, volumes, times) -> dict:
+        kind = group["type"]
+        result = {"type": kind, "rule_id": group["id"].take(rule_rows),
+                  "subscriber": group["subscriber"].take(rule_rows), "code": tickers,
+                  "price": prices.take(quote_rows), "change": change.take(quote_rows),
+                  "time": times.take(quote_rows)}
+        if kind == "price_cross":
+            result["level"] = group["level"].take(rule_rows)
+        elif kind == "sma_cross":
+            fast = state["sma_after"][group["key"][0]].take(quote_rows)
+            slow = state["sma_after"][group["key"][1]].take(quote_rows)
+            result.update(signal=np.where(fast > slow, "buy", "sell"),
+                          fast_sma=np.round(fast, 4), slow_sma=np.round(slow, 4))
+        elif kind == "volume_spike":
+            result.update(volume=volumes.take(quote_rows),
+                          average_volume=np.round(state["volume_before"][group["key"][0]].take(quote_rows), 2))
+        return result
+
+    def evaluate(self, tickers, prices, volumes=None, timestamp=None) -> List[dict]:
+        """Apply one tick and return an alert for every triggered rule.
+
+        ``timestamp`` is one datetime for the tick or one per quote (default now).
+        """
+        if timestamp is None:
+            timestamp = datetime.utcnow()
+        fired = self.match(tickers, prices, volumes, timestamp)
+        if not fired:
+            return []
+        stamp = timestamp.isoformat() if isinstance(timestamp, datetime) else None
+        names = self._names
+        alerts = []
+        for result in fired:
+            kind = result["type"]
+            quoted = np.round(result["price"], 2).tolist()
+            changes = np.round(np.nan_to_num(result["change"] * 100, nan=0.0), 2).tolist()
+            stamps = [stamp] * len(quoted) if stamp is not None else \
+                [t.isoformat() for t in result["time"].tolist()]
+            batch = [
+                {"ticker": names[code], "price": price, "change_percent": change,
+                 "timestamp": stamp, "rule": kind, "rule_id": rule_id}
+                for code, price, change, stamp, rule_id in zip(result["code"].tolist(), quoted, changes, stamps,
+                                                               result["rule_id"].tolist())
+            ]
+            for name, values in result.items():
+                if name not in FIRED_FIELDS:
+                    for alert, value in zip(batch, values.tolist()):
+                        alert[name] = value
+            if (result["subscriber"] >= 0).any():
+                for alert, subscriber in zip(batch, result["subscriber"].tolist()):
+                    if subscriber >= 0:
+                        alert["subscriber"] = subscriber
+            alerts.extend(batch)
+        return alerts
@@ -0,0 +1,274 @@
+import asyncio
+import contextlib
+import glob
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, TextIO, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process is assumed to use the spill file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between retries when the flush loop fails (e.g. disk full while spilling)
+MAX_BACKOFF = 30.0
+
+
+class AlertWriter:
+    """Background writer that stores price alerts in batches.
+
+    ``submit`` queues alerts and returns immediately unless ``max_pending``
+    alerts are already waiting, in which case it waits for room
+    (backpressure). A background task flushes the queue every
+    ``flush_interval`` seconds or as soon as ``batch_size`` alerts are
+    waiting, calling ``write_rows`` once per batch. Batches that fail to
+    write are appended to ``spill_path`` (one JSON row per line) and
+    replayed once writes succeed again. If a batch can be neither written
+    nor spilled, the task logs, keeps it and retries with backoff.
+
+    Several processes can share ``spill_path``: appends and claims hold an
+    flock on ``spill_path + ".lock"``, and a replay first moves the file to
+    ``.replaying.<pid>``, which only its process reads.
+    """
+
+    def __init__(self, write_rows: Callable[[List[dict]], Awaitable[None]], spill_path: str,
+                 batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 10000,
+                 replay_interval: float = 30.0):
+        self.write_rows = write_rows
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_pending = max_pending
+        self._task: Optional[asyncio.Task] = None
+        self._last_replay = 0.0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.malformed = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "malformed_spill_lines": self.malformed,
+            "spill_file_bytes": os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+        }
+
+    def start(self):
+        if self._task is None:
+            try:
+                self._recover()
+            except OSError as e:
+                logger.error(f"Could not put back interrupted alert replays: {e}")
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while self._queue.qsize():
+            batch = self._drain(self.batch_size)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Dropping {len(batch) + self._queue.qsize()} alerts at shutdown: {e}")
+                return
+
+    async def submit(self, rows: List[dict]):
+        self.start()
+        for row in rows:
+            await self._queue.put(row)
+
+    def _drain(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _collect(self) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+        try:
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                batch.extend(self._drain(self.batch_size - len(batch)))
+        except asyncio.CancelledError:
+            # Shutting down: do not lose the batch collected so far
+            await self._flush(batch)
+            raise
+        return batch
+
+    async def _run(self):
+        failures = 0
+        # A batch that could be neither written nor spilled stays here until it can
+        batch: List[dict] = []
+        while True:
+            if not batch:
+                batch = await self._collect()
+            try:
+                await self._flush(batch)
+                batch = []
+                if time.monotonic() - self._last_replay >= self.replay_interval:
+                    self._last_replay = time.monotonic()
+                    await self._replay()
+                failures = 0
+            except asyncio.CancelledError:
+                if batch:
+                    await self._flush(batch)
+                raise
+            except Exception as e:
+                failures += 1
+                delay = min(self.flush_interval * 2 ** failures, MAX_BACKOFF)
+                logger.error(f"Alert writer failed with {len(batch)} alerts held, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _flush(self, batch: List[dict]):
+        """Write ``batch``, spilling it if the write fails; raises only if spilling fails too."""
+        if not batch:
+            return
+        try:
+            await self.write_rows(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} alerts, spilling to {self.spill_path}: {e}")
+            await asyncio.get_running_loop().run_in_executor(None, self._spill, batch)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the lock shared by every process using ``spill_path``."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.spill_path + ".lock", "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _append_lines(self, lines: List[str]):
+        with self._locked(), open(self.spill_path, "ab") as f:
+            # A crash mid-append can leave a partial last line: start on a fresh one
+            if f.tell() and not self._ends_with_newline():
+                f.write(b"\n")
+            f.writelines(line.encode() for line in lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.spill_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _append(self, rows: List[dict]):
+        self._append_lines([json.dumps(row) + "\n" for row in rows])
+
+    def _spill(self, rows: List[dict]):
+        self._append(rows)
+        self.spilled += len(rows)
+
+    def _copy_back(self, f: TextIO):
+        """Append the unread rest of ``f`` to the spill file, 1 MB at a time."""
+        while True:
+            lines = f.readlines(1 << 20)
+            if not lines:
+                return
+            self._append_lines([line if line.endswith("\n") else line + "\n" for line in lines if line.strip()])
+
+    def _recover(self):
+        """Put back rows from replays whose process died before finishing them."""
+        for replaying in glob.glob(glob.escape(self.spill_path) + ".replaying*"):
+            pid = replaying.rsplit(".", 1)[-1]
+            if pid.isdigit() and self._alive(int(pid)):
+                continue
+            with open(replaying) as f:
+                self._copy_back(f)
+            os.remove(replaying)
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:  # exists but belongs to another user
+            pass
+        return True
+
+    def _claim(self) -> Optional[str]:
+        """Move the spill file aside for this process to replay; None if there is nothing to replay."""
+        replaying = f"{self.spill_path}.replaying.{os.getpid()}"
+        with self._locked():
+            if not os.path.exists(self.spill_path):
+                return None
+            os.replace(self.spill_path, replaying)
+        return replaying
+
+    def _read_chunk(self, f: TextIO) -> Tuple[List[dict], List[str]]:
+        """The next ``batch_size`` rows of a spill file and their lines; malformed lines are skipped."""
+        rows, lines = [], []
+        while len(rows) < self.batch_size:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                self.malformed += 1
+                logger.warning(f"Skipping malformed spilled alert: {line[:200]!r}")
+                continue
+            lines.append(line if line.endswith("\n") else line + "\n")
+        return rows, lines
+
+    def _put_back(self, lines: List[str], f: TextIO):
+        self._append_lines(lines)
+        self._copy_back(f)
+
+    async def _replay(self):
+        loop = asyncio.get_running_loop()
+        replaying = await loop.run_in_executor(None, self._claim)
+        if replaying is None:
+            return
+        done = 0
+        with open(replaying) as f:
+            while True:
+                rows, lines = await loop.run_in_executor(None, self._read_chunk, f)
+                if not rows:
+                    break
+                try:
+                    await self.write_rows(rows)
+                except Exception as e:
+                    logger.error(f"Replaying spilled alerts failed, keeping the rest: {e}")
+                    await loop.run_in_executor(None, self._put_back, lines, f)
+                    break
+                done += len(rows)
+        os.remove(replaying)
+        self.replayed += done
+        logger.debug(f"Replayed {done} spilled alerts")
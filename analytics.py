@@ -0,0 +1,635 @@
+"""Per-ticker trade analysis shared by the API and the Lambda.
+
+:class:`TradeAggregator` folds trades into per-ticker volume, trade count
+and price sum one DataFrame (or CSV chunk) at a time, so a day can be
+analysed in memory bounded by the number of tickers instead of the number
+of trades. Price sums are exact (see :func:`exact_group_sums`), which makes
+the result independent of how the trades were split into chunks: reading a
+file in chunks returns exactly what analysing it in one piece does.
+
+CSV sources can be read with pandas or, in the ``lean`` engine, with the
+csv module and NumPy only; both give identical results, and pandas (the
+bulk of a cold start) is only imported when the pandas engine is used.
+
+Day partitions are read through a storage backend (:class:`LocalBackend`,
+:class:`S3Backend`, :class:`SqlBackend`). Each declares its capabilities
+and :func:`analyze_day` / :func:`analyze_days` pick the cheapest path the
+backend supports.
+"""
+import csv
+import gc
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as Date, datetime
+from fractions import Fraction
+from itertools import islice
+from operator import itemgetter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ANALYSIS_COLUMNS = ["ticker", "price", "quantity"]
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_STREAM_BYTES = 256 * 1024 * 1024
+ENGINES = ("pandas", "lean")
+
+# Every finite double is m * 2**(e - 53) with |m| < 2**53 and e >= -1073, so
+# m << (e + 1074) is an integer multiple of 2**-_SCALE_BITS.
+_SCALE_BITS = 1074 + 53
+_LOW_BITS = 26
+
+
+def exact_group_sums(codes: np.ndarray, values: np.ndarray, groups: int) -> List[int]:
+    """Exact per-group sums of ``values`` as integers scaled by ``2**_SCALE_BITS``.
+
+    Each value is split into its integer mantissa and exponent; mantissas
+    with the same group and exponent are added in int64 (in two 26/27-bit
+    halves so no partial sum can overflow) and only the few distinct
+    (group, exponent) totals are shifted into Python integers.
+    """
+    sums = [0] * groups
+    if not len(values):
+        return sums
+    mantissa, exponent = np.frexp(values)
+    mantissa = (mantissa * (1 << 53)).astype(np.int64)
+    shift = exponent.astype(np.int64) + 1074
+    key = codes.astype(np.int64) * 4096 + shift
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    mantissa = mantissa[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    high = np.add.reduceat(mantissa >> _LOW_BITS, starts)
+    low = np.add.reduceat(mantissa & ((1 << _LOW_BITS) - 1), starts)
+    for k, h, lo in zip(key[starts].tolist(), high.tolist(), low.tolist()):
+        sums[k // 4096] += ((h << _LOW_BITS) + lo) << (k % 4096)
+    return sums
+
+
+def exact_scaled(value: float) -> int:
+    """One float as an exact sum in the :func:`exact_group_sums` scale."""
+    return int(Fraction(value) * (1 << _SCALE_BITS))
+
+
+def exact_to_float(scaled: int) -> float:
+    """Correctly rounded float of an exact sum from :func:`exact_group_sums`."""
+    return scaled / (1 << _SCALE_BITS)
+
+
+class TradeAggregator:
+    """Running per-ticker volume, trade count and exact price and notional sums."""
+
+    def __init__(self):
+        # ticker -> [volume, trade_count, priced_count, scaled price sum, scaled notional sum];
+        # the notional is None once totals without one (see add_totals) are merged in
+        self.totals: Dict[str, list] = {}
+
+    def add(self, df: "pd.DataFrame"):
+        import pandas as pd
+        if df.empty:
+            return
+        codes, tickers = pd.factorize(df["ticker"])
+        quantities = df["quantity"].to_numpy()
+        has_quantity = ~pd.isna(quantities)
+        self.add_arrays(codes, list(tickers), df["price"].to_numpy(dtype=np.float64),
+                        np.where(has_quantity, quantities, 0).astype(np.int64), has_quantity)
+
+    def add_arrays(self, codes: np.ndarray, tickers: List[str], prices: np.ndarray,
+                   quantities: np.ndarray, has_quantity: np.ndarray):
+        """Add trades given as ticker codes into ``tickers`` (-1 for none), prices (NaN if missing)
+        and int64 quantities with ``has_quantity`` false where the quantity was missing."""
+        keep = codes >= 0
+        codes = codes[keep]
+        prices = prices[keep]
+        quantities = quantities[keep]
+        has_quantity = has_quantity[keep]
+
+        counts = np.bincount(codes[has_quantity], minlength=len(tickers))
+        volumes = np.zeros(len(tickers), dtype=np.int64)
+        np.add.at(volumes, codes[has_quantity], quantities[has_quantity])
+        priced = np.isfinite(prices)
+        priced_counts = np.bincount(codes[priced], minlength=len(tickers))
+        price_sums = exact_group_sums(codes[priced], prices[priced], len(tickers))
+        traded = priced & has_quantity
+        notionals = exact_group_sums(codes[traded], prices[traded] * quantities[traded], len(tickers))
+
+        for i, ticker in enumerate(tickers):
+            self.merge_totals(ticker, [int(volumes[i]), int(counts[i]), int(priced_counts[i]), price_sums[i],
+                                       notionals[i]])
+
+    def add_totals(self, ticker: str, volume: int, trade_count: int, price_sum: float,
+                   notional: Optional[float] = None):
+        """Add a ticker's totals that were aggregated elsewhere (e.g. in SQL)."""
+        self.merge_totals(ticker, [int(volume), int(trade_count), int(trade_count), exact_scaled(price_sum),
+                                   None if notional is None else exact_scaled(notional)])
+
+    def merge_totals(self, ticker: str, values: list):
+        totals = self.totals.get(ticker)
+        if totals is None:
+            self.totals[ticker] = list(values)
+        else:
+            for i, value in enumerate(values):
+                totals[i] = None if value is None or totals[i] is None else totals[i] + value
+
+    def add_chunks(self, chunks: Iterable["pd.DataFrame"]) -> "TradeAggregator":
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    def add_csv(self, source, chunk_rows: int = DEFAULT_CHUNK_ROWS, engine: str = "pandas") -> "TradeAggregator":
+        """Add a trades CSV (path or binary file object) read ``chunk_rows`` rows at a time."""
+        if engine == "lean":
+            for chunk in read_csv_arrays(source, chunk_rows):
+                self.add_arrays(*chunk)
+            return self
+        return self.add_chunks(read_csv_chunks(source, chunk_rows))
+
+    def merge(self, other: "TradeAggregator") -> "TradeAggregator":
+        for ticker, values in other.totals.items():
+            self.merge_totals(ticker, values)
+        return self
+
+    def ticker_rows(self, vwap: bool = False) -> List[dict]:
+        """One row per ticker, sorted by ticker; ``vwap`` adds the volume-weighted price (None if unknown)."""
+        rows = []
+        for ticker, (volume, count, priced, price_sum, notional) in sorted(self.totals.items()):
+            row = {
+                "ticker": ticker,
+                "total_volume": volume,
+                "trade_count": count,
+                "avg_price": exact_to_float(price_sum) / priced if priced else None
+            }
+            if vwap:
+                row["vwap"] = round(exact_to_float(notional) / volume, 4) if volume and notional is not None else None
+            rows.append(row)
+        return rows
+
+    def notional(self) -> Optional[float]:
+        """Sum of price * quantity over every ticker; None if some totals came without one."""
+        sums = [values[4] for values in self.totals.values()]
+        return None if None in sums else exact_to_float(sum(sums))
+
+    def result(self, date: str, top: int = 10) -> dict:
+        """The /analyze/aws response for the trades added so far."""
+        rows = self.ticker_rows()
+        if not rows:
+            return {
+                "date": date,
+                "total_volume": 0,
+                "average_price": 0,
+                "trade_count": 0,
+                "top_tickers": []
+            }
+        total_volume = sum(r["total_volume"] for r in rows)
+        weighted_avg_price = sum(
+            r["avg_price"] * r["total_volume"] for r in rows if r["avg_price"] is not None
+        ) / total_volume if total_volume else 0
+        return {
+            "date": date,
+            "total_volume": int(total_volume),
+            "average_price": round(float(weighted_avg_price), 2),
+            "trade_count": sum(r["trade_count"] for r in rows),
+            "top_tickers": sorted(rows, key=lambda r: r["total_volume"], reverse=True)[:top]
+        }
+
+
+def analyze_trades(df: "pd.DataFrame", date: str) -> dict:
+    """Analyse a day's trades held in one DataFrame."""
+    aggregator = TradeAggregator()
+    aggregator.add(df)
+    return aggregator.result(date)
+
+
+def read_csv_chunks(source, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """Iterate a trades CSV (path or file object, e.g. an S3 body) in ``chunk_rows`` row chunks."""
+    import pandas as pd
+    return pd.read_csv(source, usecols=ANALYSIS_COLUMNS, chunksize=chunk_rows)
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        # Empty (or unparseable) prices are NaN, as in pandas
+        return float("nan")
+
+
+def read_csv_arrays(source, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[tuple]:
+    """Iterate a trades CSV with the csv module, yielding :meth:`TradeAggregator.add_arrays` arguments.
+
+    Empty fields are treated like pandas treats them: a row without a
+    ticker is skipped, a missing price is NaN and a missing quantity does
+    not count towards volume or trade count.
+    """
+    if isinstance(source, str):
+        f = open(source, newline="")
+    else:
+        f = io.TextIOWrapper(source, encoding="utf-8", newline="")
+    with f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        t, p, q = (header.index(name) for name in ANALYSIS_COLUMNS)
+        codes_by_ticker: Dict[str, int] = {"": -1}
+        names: List[str] = []
+        while True:
+            # The chunk is a lot of short-lived lists; cyclic GC passes over them cost more than the parse
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                rows = [row for row in islice(reader, chunk_rows) if row]
+                tickers, prices, quantities = (list(map(itemgetter(i), rows)) for i in (t, p, q))
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            if not rows:
+                return
+            for ticker in set(tickers).difference(codes_by_ticker):
+                codes_by_ticker[ticker] = len(names)
+                names.append(ticker)
+            codes = np.array(list(map(codes_by_ticker.__getitem__, tickers)), dtype=np.int64)
+            try:
+                price_array = np.array(prices, dtype=np.float64)
+            except ValueError:
+                price_array = np.array([_parse_float(x) for x in prices], dtype=np.float64)
+            try:
+                quantity_array = np.array(quantities, dtype=np.int64)
+                has_quantity = np.ones(len(rows), dtype=bool)
+            except ValueError:
+                has_quantity = np.array([x != "" for x in quantities], dtype=bool)
+                quantity_array = np.array([int(float(x)) if x else 0 for x in quantities], dtype=np.int64)
+            yield codes, list(names), price_array, quantity_array, has_quantity
+
+
+def analyze_csv(source, date: str, chunk_rows: Optional[int] = DEFAULT_CHUNK_ROWS, engine: str = "pandas") -> dict:
+    """Analyse a trades CSV without loading it whole; ``chunk_rows=None`` reads it in one piece."""
+    if chunk_rows is None and engine == "pandas":
+        import pandas as pd
+        return analyze_trades(pd.read_csv(source, usecols=ANALYSIS_COLUMNS), date)
+    return TradeAggregator().add_csv(source, chunk_rows or DEFAULT_CHUNK_ROWS, engine).result(date)
+
+
+def partition_key(day: Date) -> str:
+    return f"{day.strftime('%Y/%m/%d')}/trades.csv"
+
+
+class LocalBackend:
+    """Day partitions under ``base_dir`` (the trades_data layout).
+
+    Small partitions are loaded from their memory-mapped columnar copy;
+    ``before_read(day)`` runs first, e.g. to flush the trade journal.
+    """
+
+    name = "local"
+    capabilities = frozenset({"columnar", "chunked"})
+
+    def __init__(self, base_dir: str, before_read: Optional[Callable[[Date], None]] = None):
+        self.base_dir = base_dir
+        self.before_read = before_read
+
+    def _path(self, day: Date) -> str:
+        return os.path.join(self.base_dir, partition_key(day))
+
+    def size(self, day: Date) -> Optional[int]:
+        if self.before_read is not None:
+            self.before_read(day)
+        try:
+            return os.path.getsize(self._path(day))
+        except OSError:
+            return None
+
+    def frame(self, day: Date) -> "pd.DataFrame":
+        import columnar_store
+        return columnar_store.load_trades_frame(self._path(day))
+
+    def open(self, day: Date) -> Optional[str]:
+        path = self._path(day)
+        return path if os.path.exists(path) else None
+
+
+class S3Backend:
+    """Day partitions stored as ``YYYY/MM/DD/trades.csv`` objects in a bucket.
+
+    ``client`` is a boto3 S3 client, or anything with the same
+    ``head_object``/``get_object`` calls such as :class:`DirectoryObjectClient`
+    or a moto mock. Objects larger than ``part_size`` are downloaded as
+    parallel byte-range GETs (pinned to one version with ``IfMatch``).
+
+    With ``cache_dir`` (e.g. Lambda's /tmp) downloads are kept there under
+    their key and ETag, evicting the least recently used beyond
+    ``cache_bytes``. A cached past day is served without any request; the
+    current (UTC) day is revalidated with a HEAD and only downloaded again
+    when its ETag changed.
+    """
+
+    name = "s3"
+    capabilities = frozenset({"chunked", "parallel"})
+
+    def __init__(self, bucket: str, client=None, region: Optional[str] = None, cache_dir: Optional[str] = None,
+                 cache_bytes: int = 400 * 1024 * 1024, part_size: int = 8 * 1024 * 1024, max_concurrency: int = 8,
+                 endpoint_url: Optional[str] = None):
+        self.bucket = bucket
+        self._client = client
+        self._client_args = {"region_name": region, "endpoint_url": endpoint_url}
+        self.cache_dir = cache_dir
+        self.cache_bytes = cache_bytes
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "revalidated": 0, "downloads": 0, "requests": 0, "bytes_downloaded": 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def client(self):
+        """The S3 client, created (and boto3 imported) on first use only."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3
+                    self._client = boto3.client("s3", **self._client_args)
+        return self._client
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _head(self, key: str) -> Optional[dict]:
+        self._count("requests")
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if _is_missing(e):
+                return None
+            raise
+
+    def _get(self, key: str, etag: Optional[str] = None, first: Optional[int] = None,
+             last: Optional[int] = None) -> dict:
+        self._count("requests")
+        kwargs = {"Bucket": self.bucket, "Key": key}
+        if etag is not None:
+            kwargs["IfMatch"] = etag
+        if first is not None:
+            kwargs["Range"] = f"bytes={first}-{last}"
+        return self.client.get_object(**kwargs)
+
+    def _parts(self, size: int) -> List[tuple]:
+        return [(start, min(start + self.part_size, size) - 1) for start in range(0, size, self.part_size)]
+
+    def _fetch_parts(self, key: str, head: dict, write: Callable[[int, bytes], None]):
+        """Download the object with one ranged GET per part, ``max_concurrency`` at a time."""
+        etag = head.get("ETag")
+
+        def fetch(part):
+            data = self._get(key, etag, *part)["Body"].read()
+            write(part[0], data)
+            self._count("bytes_downloaded", len(data))
+
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        for _ in self._pool.map(fetch, self._parts(head["ContentLength"])):
+            pass
+        self._count("downloads")
+
+    def _cache_paths(self, key: str) -> tuple:
+        stem = os.path.join(self.cache_dir, os.path.splitext(key)[0].replace("/", "_"))
+        return stem + ".csv", stem + ".etag"
+
+    def _cached(self, key: str) -> Optional[tuple]:
+        data_path, etag_path = self._cache_paths(key)
+        try:
+            with open(etag_path) as f:
+                etag = f.read()
+        except OSError:
+            return None
+        return (data_path, etag) if os.path.exists(data_path) else None
+
+    def _download_to_cache(self, key: str, head: dict) -> str:
+        data_path, etag_path = self._cache_paths(key)
+        tmp = f"{data_path}.{os.getpid()}.{threading.get_ident()}.part"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, head["ContentLength"])
+            self._fetch_parts(key, head, lambda offset, data: os.pwrite(fd, data, offset))
+        except BaseException:
+            os.close(fd)
+            os.remove(tmp)
+            raise
+        os.close(fd)
+        os.replace(tmp, data_path)
+        with open(etag_path, "w") as f:
+            f.write(head.get("ETag") or "")
+        self._evict(keep=data_path)
+        return data_path
+
+    def _evict(self, keep: str):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".csv"):
+                path = os.path.join(self.cache_dir, name)
+                st = os.stat(path)
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.cache_bytes:
+                break
+            if path != keep:
+                os.remove(path)
+                try:
+                    os.remove(path[:-len(".csv")] + ".etag")
+                except OSError:
+                    pass
+                total -= size
+
+    def fetch(self, day: Date):
+        """A readable source for the day's CSV (cached path or in-memory body), or None if there is none."""
+        key = partition_key(day)
+        cached = self._cached(key) if self.cache_dir else None
+        if cached is not None and day < datetime.utcnow().date():
+            self._count("cache_hits")
+            os.utime(cached[0])
+            return cached[0]
+        head = self._head(key)
+        if head is None:
+            return None
+        if cached is not None and cached[1] == head.get("ETag"):
+            self._count("revalidated")
+            os.utime(cached[0])
+            return cached[0]
+        if self.cache_dir:
+            return self._download_to_cache(key, head)
+        if head["ContentLength"] <= self.part_size:
+            self._count("downloads")
+            return self._get(key, head.get("ETag"))["Body"]
+        buffer = bytearray(head["ContentLength"])
+
+        def write(offset: int, data: bytes):
+            buffer[offset:offset + len(data)] = data
+
+        self._fetch_parts(key, head, write)
+        return io.BytesIO(buffer)
+
+    def open(self, day: Date):
+        return self.fetch(day)
+
+
+class SqlBackend:
+    """Trades in the database; the per-ticker aggregation runs in SQL on the day rollup."""
+
+    name = "sql"
+    capabilities = frozenset({"pushdown"})
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def aggregate(self, start: Date, end: Date) -> TradeAggregator:
+        from sqlalchemy import func
+        from database import TradeRollupDay
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                TradeRollupDay.ticker,
+                func.sum(TradeRollupDay.volume),
+                func.sum(TradeRollupDay.trade_count),
+                func.sum(TradeRollupDay.price_sum)
+            ).filter(
+                TradeRollupDay.bucket >= start,
+                TradeRollupDay.bucket <= end
+            ).group_by(TradeRollupDay.ticker).all()
+        finally:
+            db.close()
+        aggregator = TradeAggregator()
+        for ticker, volume, trade_count, price_sum in rows:
+            aggregator.add_totals(ticker, volume, trade_count, float(price_sum))
+        return aggregator
+
+
+class _ClientError(Exception):
+    """Shaped like botocore's ClientError so callers can check ``response["Error"]["Code"]``."""
+
+    def __init__(self, code: str, key: str):
+        super().__init__(f"{code}: {key}")
+        self.response = {"Error": {"Code": code}}
+
+
+def _is_missing(error: Exception) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("NoSuchKey", "404", "NotFound")
+
+
+class DirectoryObjectClient:
+    """Local stand-in for the S3 client calls :class:`S3Backend` makes, reading ``root/<bucket>/<key>``."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    @staticmethod
+    def _etag(st: os.stat_result) -> str:
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        try:
+            st = os.stat(self._path(Bucket, Key))
+        except OSError:
+            raise _ClientError("NoSuchKey", Key)
+        return {"ContentLength": st.st_size, "ETag": self._etag(st)}
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, IfMatch: Optional[str] = None) -> dict:
+        try:
+            f = open(self._path(Bucket, Key), "rb")
+        except OSError:
+            raise _ClientError("NoSuchKey", Key)
+        st = os.fstat(f.fileno())
+        etag = self._etag(st)
+        if IfMatch is not None and IfMatch != etag:
+            f.close()
+            raise _ClientError("PreconditionFailed", Key)
+        if Range is None:
+            return {"Body": f, "ContentLength": st.st_size, "ETag": etag}
+        first, last = (int(p) for p in Range.split("=", 1)[1].split("-"))
+        with f:
+            f.seek(first)
+            data = f.read(last - first + 1)
+        return {"Body": io.BytesIO(data), "ContentLength": len(data), "ETag": etag}
+
+    def put_object(self, Bucket: str, Key: str, Body, **kwargs) -> dict:
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(Body.encode() if isinstance(Body, str) else Body)
+        return {}
+
+
+def aggregate_day(backend, day: Date, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  stream_bytes: int = DEFAULT_STREAM_BYTES, engine: str = "pandas") -> TradeAggregator:
+    """Per-ticker totals for one day, read the cheapest way ``backend`` allows.
+
+    Pushdown backends aggregate in place. Otherwise the partition is loaded
+    whole when the backend has a columnar copy and it is at most
+    ``stream_bytes``, and read from ``backend.open(day)`` (None when the day
+    has no partition) in ``chunk_rows`` row chunks with ``engine`` if not.
+    """
+    caps = backend.capabilities
+    if "pushdown" in caps:
+        return backend.aggregate(day, day)
+    aggregator = TradeAggregator()
+    if "columnar" in caps:
+        size = backend.size(day)
+        if size is None:
+            return aggregator
+        if size <= stream_bytes and engine == "pandas":
+            aggregator.add(backend.frame(day))
+            return aggregator
+    source = backend.open(day)
+    if source is not None:
+        aggregator.add_csv(source, chunk_rows, engine)
+    return aggregator
+
+
+def analyze_day(backend, day: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                stream_bytes: int = DEFAULT_STREAM_BYTES, engine: str = "pandas") -> dict:
+    """The /analyze/aws response for ``day`` (``YYYY-MM-DD``)."""
+    parsed = datetime.strptime(day, "%Y-%m-%d").date()
+    return aggregate_day(backend, parsed, chunk_rows, stream_bytes, engine).result(day)
+
+
+def analyze_days(backend, days: List[Date], chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 stream_bytes: int = DEFAULT_STREAM_BYTES, workers: int = 8,
+                 engine: str = "pandas") -> TradeAggregator:
+    """Merged per-ticker totals over ``days``; parallel backends fetch ``workers`` days at once."""
+    caps = backend.capabilities
+    if "pushdown" in caps and days:
+        total = TradeAggregator()
+        for start, end in _contiguous(sorted(days)):
+            total.merge(backend.aggregate(start, end))
+        return total
+    total = TradeAggregator()
+    if "parallel" in caps and len(days) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(days))) as pool:
+            for aggregator in pool.map(lambda d: aggregate_day(backend, d, chunk_rows, stream_bytes, engine), days):
+                total.merge(aggregator)
+    else:
+        for day in days:
+            total.merge(aggregate_day(backend, day, chunk_rows, stream_bytes, engine))
+    return total
+
+
+def _contiguous(days: List[Date]):
+    start = prev = days[0]
+    for day in days[1:]:
+        if (day - prev).days > 1:
+            yield start, prev
+            start = day
+        prev = day
+    yield start, prev
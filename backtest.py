@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+ONE_DAY = np.timedelta64(1, "D")
+
+
+class PriceHistory:
+    """Close prices of many tickers packed into flat arrays.
+
+    Rows are sorted by (ticker, date); the rows of ``tickers[k]`` are
+    ``starts[k]:starts[k + 1]``.
+    """
+
+    def __init__(self, tickers: np.ndarray, starts: np.ndarray, dates: np.ndarray, closes: np.ndarray):
+        self.tickers = tickers
+        self.starts = starts
+        self.dates = dates
+        self.closes = closes
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceHistory":
+        tickers = df["ticker"].to_numpy().astype(str)
+        dates = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[us]")
+        closes = df["close_price"].to_numpy(dtype=np.float64)
+        order = np.lexsort((dates, tickers))
+        tickers, dates, closes = tickers[order], dates[order], closes[order]
+        names, starts = np.unique(tickers, return_index=True)
+        return cls(names, np.append(starts, len(tickers)), dates, closes)
+
+    def select(self, tickers: Optional[Iterable[str]]) -> "PriceHistory":
+        if tickers is None:
+            return self
+        requested = set(tickers)
+        wanted = [i for i, t in enumerate(self.tickers) if t in requested]
+        if len(wanted) == len(self.tickers):
+            return self
+        pieces = [np.arange(self.starts[i], self.starts[i + 1]) for i in wanted]
+        rows = np.concatenate(pieces) if pieces else np.array([], dtype=np.int64)
+        lengths = [len(p) for p in pieces]
+        return PriceHistory(self.tickers[wanted], np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+                            self.dates[rows], self.closes[rows])
+
+    def row_ticker_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.tickers)), np.diff(self.starts))
+
+    def positions(self) -> np.ndarray:
+        """Index of every row within its own ticker's series."""
+        return np.arange(len(self.closes)) - np.repeat(self.starts[:-1], np.diff(self.starts))
+
+
+def rolling_mean(history: PriceHistory, window: int, positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """Per-ticker trailing mean over ``window`` rows, NaN until the window is full.
+
+    Matches ``Series.rolling(window).mean()`` on each ticker: a window that
+    contains a missing price is NaN.
+    """
+    closes = history.closes
+    missing = np.isnan(closes)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, closes))))
+    cmiss = np.concatenate(([0], np.cumsum(missing)))
+    n = len(closes)
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    means = (csum[end] - csum[start]) / window
+    if positions is None:
+        positions = history.positions()
+    valid = (positions >= window - 1) & (cmiss[end] == cmiss[start])
+    return np.where(valid, means, np.nan)
+
+
+def crossover_candidates(history: PriceHistory, fast: int, slow: int,
+                         sma_cache: Optional[Dict[int, np.ndarray]] = None):
+    """Rows where the fast SMA crosses the slow one: (row indices, +1 buy / -1 sell).
+
+    ``sma_cache`` maps window -> rolling mean for ``history`` and is filled
+    as windows are computed, so repeated calls (parameter sweeps) reuse them.
+    """
+    positions = history.positions()
+    if sma_cache is None:
+        sma_cache = {}
+    for window in (fast, slow):
+        if window not in sma_cache:
+            sma_cache[window] = rolling_mean(history, window, positions)
+    sma_fast, sma_slow = sma_cache[fast], sma_cache[slow]
+    prev_fast, prev_slow = sma_fast[:-1], sma_slow[:-1]
+    cur_fast, cur_slow = sma_fast[1:], sma_slow[1:]
+    # NaN comparisons are False, so rows without a full window never fire
+    buy = (prev_fast < prev_slow) & (cur_fast > cur_slow)
+    sell = (prev_fast > prev_slow) & (cur_fast < cur_slow)
+    eligible = positions[1:] >= max(fast, slow)
+    rows = np.flatnonzero((buy | sell) & eligible) + 1
+    return rows, np.where(buy[rows - 1], 1, -1)
+
+
+def backtest(history: PriceHistory, fast: int = 50, slow: int = 200, cooldown_days: int = 5,
+             sma_cache: Optional[Dict[int, np.ndarray]] = None) -> dict:
+    """SMA crossover backtest over every ticker in ``history`` at once.
+
+    Crossovers are found with array operations over all tickers; only the
+    candidate rows are walked to apply the cooldown (a crossover less than
+    ``cooldown_days`` after the last signal is ignored) and to book P/L the
+    way the original /simulate loop did.
+    """
+    rows, sides = crossover_candidates(history, fast, slow, sma_cache)
+    ticker_ids = history.row_ticker_ids()[rows]
+    dates = history.dates[rows]
+    prices = history.closes[rows]
+    date_strings = np.datetime_as_string(dates, unit="D")
+
+    signals: List[dict] = []
+    ticker_pl: Dict[str, float] = {str(t): 0.0 for t in history.tickers}
+    current = -1
+    for k in range(len(rows)):
+        tid = ticker_ids[k]
+        if tid != current:
+            current, position, last_date = tid, None, None
+        if last_date is not None and (dates[k] - last_date) // ONE_DAY < cooldown_days:
+            continue
+        ticker = str(history.tickers[tid])
+        price = float(prices[k])
+        if sides[k] > 0:
+            if position is not None:
+                ticker_pl[ticker] += position - price
+            position = price
+            action = "buy"
+        else:
+            if position is not None:
+                ticker_pl[ticker] += price - position
+            position = None
+            action = "sell"
+        last_date = dates[k]
+        signals.append({"date": str(date_strings[k]), "ticker": ticker, "action": action, "price": price})
+
+    signals.sort(key=lambda s: (s["date"], s["ticker"]))
+    return {
+        "signals": signals,
+        "profit_loss": float(sum(ticker_pl.values())),
+        "ticker_profit_loss": ticker_pl
+    }
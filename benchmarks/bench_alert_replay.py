@@ -0,0 +1,77 @@
+"""Throughput of the real-time alert path on replayed market data.
+
+Replays ``--path`` (historical_prices.csv by default, widened to ``--copies``
+variants of every ticker) through ``alert_hub.price_tick`` into an
+``AlertHub`` with ``--clients`` subscribers, each following all tickers or a
+random handful, and ``--speed`` times faster than recorded (0: as fast as
+possible). Every subscriber encodes its batches the way ``/ws`` does, so the
+reported latency runs from the tick to the encoded WebSocket message.
+
+    python benchmarks/bench_alert_replay.py --copies 250 --clients 100 --speed 0
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_hub import AlertHub  # noqa: E402
+from replay import Replayer, load_tape  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def send(hub: AlertHub, subscriber, sent):
+    while True:
+        created, batch = await subscriber.get_batch()
+        batch.message()
+        hub.latency.record(time.perf_counter() - created)
+        sent[0] += len(batch)
+        await asyncio.sleep(0)
+
+
+async def run(args):
+    tape = load_tape(args.path).widen(args.copies)
+    hub = AlertHub(queue_size=args.queue_size)
+    tickers = sorted(set(tape.tickers.tolist()))
+    subscribers = [hub.subscribe(None if i % 10 == 0 else random.sample(tickers, min(5, len(tickers))))
+                   for i in range(args.clients)]
+    sent = [0]
+    senders = [asyncio.create_task(send(hub, s, sent)) for s in subscribers]
+    replayer = Replayer(tape, args.speed)
+    await replayer.run(hub)
+    while any(s.qsize() for s in subscribers):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - replayer.started
+    for task in senders:
+        task.cancel()
+
+    stats = replayer.stats()
+    latency = hub.latency.stats()
+    dropped = sum(s.dropped for s in subscribers)
+    print(f"{stats['tickers']} tickers, {len(tape)} ticks, {args.clients} clients, speed {stats['speed']}")
+    print(f"  replay: {stats['quotes']:,} quotes in {stats['elapsed']:.2f}s "
+          f"({stats['quotes_per_second']:,.0f} quotes/s), max lag {stats['max_lag'] * 1000:.1f} ms")
+    print(f"  alerts: {stats['alerts']:,} generated ({stats['alerts_per_second']:,.0f}/s), "
+          f"{sent[0]:,} sent ({sent[0] / elapsed:,.0f}/s), {dropped:,} coalesced/dropped")
+    if latency["count"]:
+        print(f"  tick-to-send latency: p50 {latency['p50']:.2f} ms | p95 {latency['p95']:.2f} ms | "
+              f"p99 {latency['p99']:.2f} ms | max {latency['max']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=os.path.join(ROOT, "historical_prices.csv"))
+    parser.add_argument("--copies", type=int, default=250, help="variants of every recorded ticker")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=0, help="multiple of recorded time, 0 = as fast as possible")
+    parser.add_argument("--queue-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
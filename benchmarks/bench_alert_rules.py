@@ -0,0 +1,111 @@
+"""Per-tick cost of the alert rule engine.
+
+Registers ``--rules`` rules over ``--tickers`` symbols (a mix of percent
+moves, price crossings, SMA crossovers and volume spikes, global and per
+subscriber, a few for every ticker), warms the SMA windows up and then
+times ticks quoting every symbol: ``match`` (state update plus all rule
+checks) and ``evaluate`` (the same plus building the alert dicts). The same
+ticks through an engine with one rule per SMA/volume window give the
+per-ticker state update cost alone; the difference is the cost of checking
+the rules.
+
+    python benchmarks/bench_alert_rules.py --rules 100000 --tickers 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_rules import RuleEngine  # noqa: E402
+
+SMA_PAIRS = [(5, 20), (10, 50), (20, 100)]
+
+
+def make_rules(count: int, tickers: list, subscribers: int) -> list:
+    rules = [({"type": "percent_move", "percent": 2.0}, None)]
+    for i in range(count - 1):
+        ticker = tickers[i % len(tickers)]
+        owner = random.randrange(subscribers) if subscribers else None
+        kind = i % 10
+        if kind < 5:
+            spec = {"type": "percent_move", "ticker": ticker, "percent": random.uniform(0.5, 5),
+                    "direction": random.choice(("up", "down", "both"))}
+        elif kind < 8:
+            spec = {"type": "price_cross", "ticker": ticker, "level": random.uniform(90, 110)}
+        elif kind < 9:
+            fast, slow = random.choice(SMA_PAIRS)
+            spec = {"type": "sma_cross", "ticker": ticker, "fast": fast, "slow": slow}
+        else:
+            spec = {"type": "volume_spike", "ticker": ticker, "multiple": random.uniform(2, 5), "window": 20}
+        rules.append((spec, owner))
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=5_000)
+    parser.add_argument("--subscribers", type=int, default=1_000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(1)
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    engine = RuleEngine()
+    for spec, owner in make_rules(args.rules, tickers, args.subscribers):
+        engine.add(spec, owner)
+    baseline = RuleEngine([{"type": "sma_cross", "fast": fast, "slow": slow, "ticker": tickers[0]}
+                           for fast, slow in SMA_PAIRS] +
+                          [{"type": "volume_spike", "multiple": 3, "window": 20, "ticker": tickers[0]}])
+    codes = engine.ticker_codes(tickers)
+    baseline.ticker_codes(tickers)
+    rng = np.random.default_rng(1)
+    prices = np.full(args.tickers, 100.0)
+
+    def next_tick():
+        prices[:] *= 1 + rng.normal(0, 0.01, args.tickers)
+        return prices.copy(), rng.lognormal(6, 0.5, args.tickers)
+
+    warmup = max(slow for _, slow in SMA_PAIRS) + 1
+    for _ in range(warmup):
+        tick = next_tick()
+        engine.match(codes, *tick)
+        baseline.match(codes, *tick)
+
+    times = {"match": [], "evaluate": [], "state": []}
+    alerts = 0
+    for i in range(args.ticks):
+        tick = next_tick()
+        start = time.perf_counter()
+        if i % 2:
+            alerts += len(engine.evaluate(codes, *tick))
+            times["evaluate"].append(time.perf_counter() - start)
+        else:
+            engine.match(codes, *tick)
+            times["match"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        baseline.match(codes, *tick)
+        times["state"].append(time.perf_counter() - start)
+
+    median = {name: statistics.median(values) * 1000 for name, values in times.items()}
+
+    def summary(name):
+        values = sorted(times[name])
+        return f"median {median[name]:.3f} ms | p99 {values[int(0.99 * (len(values) - 1))] * 1000:.3f} ms"
+
+    print(f"{len(engine):,} rules, {args.tickers:,} tickers quoted per tick, {args.ticks} ticks")
+    print(f"  match (state update + rule checks): {summary('match')}")
+    print(f"  state update alone:                 {summary('state')}")
+    print(f"  rule checks:                        {median['match'] - median['state']:.3f} ms per tick")
+    print(f"  evaluate (+ alert dicts):           {summary('evaluate')} | "
+          f"{alerts / len(times['evaluate']):,.0f} alerts per tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Day analysis through each analytics storage backend on the same data.
+
+Writes ``--days`` day partitions of ``--trades`` trades each to a scratch
+trades_data directory, mirrors them into a directory standing in for the S3
+bucket and loads the day rollup into a SQLite database, then times
+``analytics.aggregate_day`` for one day and ``analytics.analyze_days`` for the
+whole range on every backend and checks that they agree.
+
+    python benchmarks/bench_analytics_backends.py --trades 1000000 --days 5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics  # noqa: E402
+import columnar_store  # noqa: E402
+import rollups  # noqa: E402
+from bench_columnar_store import timed, write_trades  # noqa: E402
+from database import Base, TradeRollupDay  # noqa: E402
+
+START = date(2025, 6, 5)
+BUCKET = "trades"
+
+
+def build(tmp: str, trades: int, days: int):
+    local_dir = os.path.join(tmp, "trades_data")
+    s3_dir = os.path.join(tmp, "s3")
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'rollups.db')}")
+    Base.metadata.create_all(engine, tables=[TradeRollupDay.__table__])
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    for i in range(days):
+        day = START + timedelta(days=i)
+        path = os.path.join(local_dir, analytics.partition_key(day))
+        os.makedirs(os.path.dirname(path))
+        write_trades(path, trades)
+        target = os.path.join(s3_dir, BUCKET, analytics.partition_key(day))
+        os.makedirs(os.path.dirname(target))
+        shutil.copyfile(path, target)
+        df = columnar_store.load_trades_frame(path)
+        rows = rollups.fold(df.assign(timestamp=pd.Timestamp(day)).itertuples(index=False), rollups.day_bucket)
+        rollups._upsert(db, TradeRollupDay, list(rows.values()))
+    db.commit()
+    db.close()
+    return {
+        "local (columnar)": analytics.LocalBackend(local_dir),
+        "local (chunked)": analytics.LocalBackend(local_dir),
+        "s3 (directory)": analytics.S3Backend(BUCKET, analytics.DirectoryObjectClient(s3_dir)),
+        "sql (day rollup)": analytics.SqlBackend(session_factory),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000, help="trades per day")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--chunk-rows", type=int, default=analytics.DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+    columnar_store.HOT_PARTITION_SECONDS = 0
+    days = [START + timedelta(days=i) for i in range(args.days)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = build(tmp, args.trades, args.days)
+        expected = None
+        print(f"{args.days} days x {args.trades:,} trades")
+        for name, backend in backends.items():
+            stream_bytes = 0 if "chunked" in name else analytics.DEFAULT_STREAM_BYTES
+            result = analytics.aggregate_day(backend, START, args.chunk_rows, stream_bytes).result("")
+            one_day = timed(lambda: analytics.aggregate_day(backend, START, args.chunk_rows, stream_bytes))
+            start = time.perf_counter()
+            total = analytics.analyze_days(backend, days, args.chunk_rows, stream_bytes)
+            all_days = time.perf_counter() - start
+            if expected is None:
+                expected = result
+            tickers = {r["ticker"]: r for r in result["top_tickers"]}
+            agrees = result["trade_count"] == expected["trade_count"] and all(
+                abs(r["avg_price"] - tickers[r["ticker"]]["avg_price"]) < 1e-6 for r in expected["top_tickers"])
+            print(f"  {name:18} [{','.join(sorted(backend.capabilities))}] one day {one_day * 1000:9.1f} ms | "
+                  f"{args.days} days {all_days * 1000:9.1f} ms | {total.result('')['trade_count']:,} trades"
+                  f"{'' if agrees else ' | MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
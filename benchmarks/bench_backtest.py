@@ -0,0 +1,73 @@
+"""Vectorized SMA crossover backtest over a synthetic universe.
+
+Builds ``--tickers`` random-walk series of ``--days`` daily bars, times
+backtest.backtest over all of them, and times the old per-row pandas loop
+on a single ticker for comparison.
+
+    python benchmarks/bench_backtest.py --tickers 500 --days 2520
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import PriceHistory, backtest  # noqa: E402
+
+
+def synthetic_prices(tickers: int, days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-01-01", periods=days)
+    steps = rng.normal(0, 1, size=(tickers, days))
+    return pd.DataFrame({
+        "date": np.tile(dates, tickers),
+        "ticker": np.repeat([f"T{i:04d}" for i in range(tickers)], days),
+        "close_price": (100 + np.cumsum(steps, axis=1)).ravel(),
+    })
+
+
+def legacy_loop(df: pd.DataFrame) -> int:
+    df = df.copy()
+    df["sma50"] = df["close_price"].rolling(window=50).mean()
+    df["sma200"] = df["close_price"].rolling(window=200).mean()
+    crossings = 0
+    for i in range(200, len(df)):
+        if pd.notna(df["sma50"].iloc[i]) and pd.notna(df["sma200"].iloc[i]):
+            if (df["sma50"].iloc[i - 1] < df["sma200"].iloc[i - 1]) != (df["sma50"].iloc[i] < df["sma200"].iloc[i]):
+                crossings += 1
+    return crossings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_prices(args.tickers, args.days)
+    history = PriceHistory.from_frame(df)
+    bars = len(history.closes)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = backtest(history)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"Vectorized: {args.tickers} tickers x {args.days} bars = {bars:,} bars, "
+          f"{len(result['signals'])} signals, best {best * 1000:.1f} ms ({bars / best:,.0f} bars/s)")
+
+    one = df[df["ticker"] == history.tickers[0]]
+    start = time.perf_counter()
+    legacy_loop(one)
+    elapsed = time.perf_counter() - start
+    print(f"Legacy loop: 1 ticker x {args.days} bars in {elapsed * 1000:.1f} ms ({args.days / elapsed:,.0f} bars/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""CSV parsing vs the memory-mapped columnar store.
+
+Writes a synthetic day partition of ``--trades`` rows and a price file of
+``--tickers`` x ``--days`` bars to a scratch directory, then times a plain
+CSV parse, the one-off conversion, a cold columnar load (in-process cache
+cleared) and a warm load from the cache.
+
+    python benchmarks/bench_columnar_store.py --trades 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar_store  # noqa: E402
+from backtest import PriceHistory  # noqa: E402
+from bench_backtest import synthetic_prices  # noqa: E402
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_trades(path: str, count: int):
+    rng = np.random.default_rng(0)
+    start = np.datetime64("2025-06-05T00:00:00")
+    pd.DataFrame({
+        "id": np.arange(1, count + 1),
+        "ticker": rng.choice(["AAPL", "GOOGL", "MSFT", "TSLA"], count),
+        "price": rng.uniform(100, 3000, count).round(2),
+        "quantity": rng.integers(1, 100, count),
+        "trade_type": rng.choice(["buy", "sell"], count),
+        "timestamp": np.datetime_as_string(start + np.sort(rng.integers(0, 86_400_000_000, count)).astype("timedelta64[us]")),
+    }).to_csv(path, index=False)
+
+
+def report(name, csv_time, cold, warm):
+    print(f"{name}: csv parse {csv_time * 1000:9.1f} ms | columnar cold {cold * 1000:7.2f} ms "
+          f"({csv_time / cold:6.1f}x) | warm {warm * 1e6:7.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2520)
+    args = parser.parse_args()
+    columnar_store.HOT_PARTITION_SECONDS = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trades_csv = os.path.join(tmp, "trades.csv")
+        write_trades(trades_csv, args.trades)
+
+        def parse_trades():
+            df = pd.read_csv(trades_csv)
+            df["timestamp"] = columnar_store.parse_timestamps(df["timestamp"])
+
+        csv_time = timed(parse_trades)
+        start = time.perf_counter()
+        columnar_store.load_trades_frame(trades_csv)
+        print(f"trades: one-off conversion {time.perf_counter() - start:.2f}s")
+
+        def cold_trades():
+            columnar_store.clear_cache()
+            columnar_store.load_trades_frame(trades_csv)
+
+        report(f"trades ({args.trades:,} rows)", csv_time, timed(cold_trades),
+               timed(lambda: columnar_store.load_trades_frame(trades_csv)))
+
+        prices_csv = os.path.join(tmp, "historical_prices.csv")
+        synthetic_prices(args.tickers, args.days).to_csv(prices_csv, index=False)
+        csv_time = timed(lambda: PriceHistory.from_frame(pd.read_csv(prices_csv)))
+        columnar_store.load_price_history(prices_csv)
+
+        def cold_prices():
+            columnar_store.clear_cache()
+            columnar_store.load_price_history(prices_csv)
+
+        report(f"prices ({args.tickers * args.days:,} bars)", csv_time, timed(cold_prices),
+               timed(lambda: columnar_store.load_price_history(prices_csv)))
+
+
+if __name__ == "__main__":
+    main()
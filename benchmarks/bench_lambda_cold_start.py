@@ -0,0 +1,117 @@
+"""Cold-start cost of lambda_function in its lean and pandas modes.
+
+Every run starts a fresh interpreter with ``python -X importtime``, imports
+lambda_function (init) and handles one request for a day of ``--trades``
+trades served from a local S3 stand-in with an empty /tmp cache, like the
+first invocation of a new container. Reports init and first-invocation
+time, peak RSS and the heaviest imports. ``eager`` imports pandas and boto3
+up front the way lambda_function used to.
+
+    python benchmarks/bench_lambda_cold_start.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_columnar_store import write_trades  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET = "trading-system-trades-1234"
+
+CHILD = """
+import json, sys, time
+
+
+def peak_rss_mb():
+    # VmHWM, unlike ru_maxrss, is not inherited from the parent across exec
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+start = time.perf_counter()
+for name in PREIMPORTS:
+    __import__(name)
+import lambda_function
+init = time.perf_counter() - start
+start = time.perf_counter()
+response = lambda_function.lambda_handler({"queryStringParameters": {"date": "2025-06-05"}}, None)
+invoke = time.perf_counter() - start
+print(json.dumps({
+    "status": response["statusCode"],
+    "init_ms": init * 1000,
+    "invoke_ms": invoke * 1000,
+    "max_rss_mb": peak_rss_mb(),
+    "pandas_loaded": "pandas" in sys.modules,
+    "boto3_loaded": "boto3" in sys.modules,
+}))
+"""
+
+MODES = {
+    "lean": ("lean", []),
+    "pandas": ("pandas", []),
+    "eager (previous)": ("pandas", ["pandas", "boto3"]),
+}
+
+
+def top_imports(importtime: str, count: int = 6) -> list:
+    """Packages imported at the top two levels by cumulative import time (us) from ``-X importtime`` output."""
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth <= 1 and "." not in name.strip():
+            try:
+                totals[name.strip()] = int(cumulative)
+            except ValueError:
+                pass
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def run(mode: str, s3_dir: str) -> tuple:
+    engine, preimports = MODES[mode]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, S3_LOCAL_DIR=s3_dir, S3_CACHE_DIR=cache_dir, ANALYZE_ENGINE=engine)
+        code = f"PREIMPORTS = {preimports!r}\n" + CHILD
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                              capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, top_imports(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--trades", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as s3_dir:
+        day_dir = os.path.join(s3_dir, BUCKET, "2025", "06", "05")
+        os.makedirs(day_dir)
+        write_trades(os.path.join(day_dir, "trades.csv"), args.trades)
+        print(f"{args.runs} cold starts per mode, one day of {args.trades:,} trades")
+        for mode in MODES:
+            results, imports = [], []
+            for _ in range(args.runs):
+                result, imports = run(mode, s3_dir)
+                results.append(result)
+            median = {key: statistics.median(r[key] for r in results)
+                      for key in ("init_ms", "invoke_ms", "max_rss_mb")}
+            loaded = [name for name in ("pandas", "boto3") if results[0][f"{name}_loaded"]]
+            print(f"  {mode:17} init {median['init_ms']:7.1f} ms | first invocation {median['invoke_ms']:7.1f} ms | "
+                  f"total {median['init_ms'] + median['invoke_ms']:7.1f} ms | peak RSS {median['max_rss_mb']:6.1f} MB | "
+                  f"loaded: {', '.join(loaded) or '-'}")
+            print("    heaviest imports: " + ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in imports))
+
+
+if __name__ == "__main__":
+    main()
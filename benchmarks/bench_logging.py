@@ -0,0 +1,170 @@
+"""Cost of hot-path debug logging, before and after log_setup.py.
+
+Sends ``--requests`` ``POST /trades``-style requests straight into a
+FastAPI app over ASGI (body parsed into the ``Trade`` model, ``trade_dict``
++ ``FastJSONResponse`` returned; no database or network) whose handler logs
+``--logs`` DEBUG lines, and reports the request rate and the overhead
+against the same app without logging:
+
+- before: ``logging.basicConfig`` at DEBUG writing synchronously, messages
+  built with f-strings,
+- after: ``GatedLogger`` + ``AsyncQueueHandler`` with lazy ``%`` arguments
+  at the default rate limit (``LOG_RATE_LIMIT`` per call site), without
+  the rate limit (every record formatted and written by the background
+  thread) and at INFO.
+
+"caller" is the time spent on the event loop; "total" also waits for the
+writer thread to drain the queue. Output goes to a temporary file.
+
+The cases run interleaved, ``--rounds`` times, and the fastest run of each
+counts.
+
+    python benchmarks/bench_logging.py --requests 20000 --logs 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from logging.handlers import QueueListener
+from types import SimpleNamespace
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from log_setup import TEXT_FORMAT, AsyncQueueHandler, CallSiteLimiter, GatedLogger, TextFormatter  # noqa: E402
+from serialization import FastJSONResponse, trade_dict  # noqa: E402
+
+logger = logging.getLogger("bench")
+logger.__class__ = GatedLogger
+
+
+class Trade(BaseModel):
+    ticker: str
+    price: float
+    quantity: int
+    trade_type: str
+    timestamp: datetime
+
+
+def make_app(logs: int, mode: str) -> FastAPI:
+    app = FastAPI()
+    next_id = iter(range(1, 1 << 62))
+
+    @app.post("/trades")
+    async def add_trade(trade: Trade):
+        db_trade = SimpleNamespace(id=next(next_id), **trade.dict())
+        for _ in range(logs):
+            if mode == "fstring":
+                logger.debug(f"Trade added to DB: {db_trade.id} {db_trade.ticker} {db_trade.price}")
+            elif mode == "lazy":
+                logger.debug("Trade added to DB: %s %s %s", db_trade.id, db_trade.ticker, db_trade.price)
+        return FastJSONResponse({"message": "Trade added successfully", "trade": trade_dict(db_trade)})
+
+    return app
+
+
+BODY = json.dumps({"ticker": "AAPL", "price": 152.0, "quantity": 5, "trade_type": "buy",
+                   "timestamp": "2025-06-05T20:32:00Z"}).encode()
+SCOPE = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+         "path": "/trades", "raw_path": b"/trades", "root_path": "", "query_string": b"",
+         "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(BODY)).encode())],
+         "client": ("127.0.0.1", 1), "server": ("testserver", 80)}
+
+
+async def post_trades(app: FastAPI, requests: int) -> float:
+    """Seconds taken by ``requests`` requests."""
+    async def receive():
+        return {"type": "http.request", "body": BODY, "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return time.perf_counter() - started
+
+
+def reset(handler: logging.Handler, level: int):
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+
+class Case:
+    """One logging setup; ``run`` times one pass of the requests, waiting for the writer for ``total``."""
+
+    def __init__(self, name: str, mode: str, level: int, out, rate_limit: Optional[float] = None):
+        self.name = name
+        self.mode = mode
+        self.level = level
+        self.rate_limit = rate_limit
+        if rate_limit is None:  # before: synchronous handler, or no logging at all
+            self.handler = logging.StreamHandler(out) if mode != "none" else logging.NullHandler()
+            self.handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            self.writer = None
+        else:
+            self.handler = AsyncQueueHandler(max_pending=1 << 30)
+            self.writer = logging.StreamHandler(out)
+            self.writer.setFormatter(TextFormatter(TEXT_FORMAT))
+        self.limiter = CallSiteLimiter(rate_limit=rate_limit) if rate_limit is not None else None
+        self.runs = []
+
+    def run(self, app: FastAPI, requests: int):
+        GatedLogger.limiter = self.limiter
+        reset(self.handler, self.level)
+        listener = QueueListener(self.handler.queue, self.writer) if self.writer is not None else None
+        if listener is not None:
+            listener.start()
+        started = time.perf_counter()
+        caller = asyncio.run(post_trades(app, requests))
+        if listener is not None:
+            listener.stop()
+        self.runs.append((caller, time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--logs", type=int, default=2, help="debug lines per request")
+    parser.add_argument("--rate-limit", type=float, default=float(os.getenv("LOG_RATE_LIMIT", "50")))
+    parser.add_argument("--rounds", type=int, default=5, help="every case runs once per round; the fastest counts")
+    args = parser.parse_args()
+
+    out = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+    cases = [Case("no logging", "none", logging.WARNING, out),
+             Case("before: basicConfig, f-strings", "fstring", logging.DEBUG, out),
+             Case(f"after: rate limit {args.rate_limit:g}/s", "lazy", logging.DEBUG, out, args.rate_limit),
+             Case("after: no rate limit", "lazy", logging.DEBUG, out, 0.0),
+             Case("after: level INFO", "lazy", logging.INFO, out, args.rate_limit)]
+    apps = {mode: make_app(args.logs, mode) for mode in ("none", "fstring", "lazy")}
+    asyncio.run(post_trades(apps["none"], 500))
+    # Rounds rather than one case after another, so drift in machine speed hits every case alike
+    for _ in range(args.rounds):
+        for case in cases:
+            case.run(apps[case.mode], args.requests)
+
+    baseline = min(cases[0].runs)[0]
+    print(f"{'case':<40}{'requests/s':>12}{'caller':>10}{'total':>10}")
+    for case in cases:
+        caller, total = min(case.runs)
+        print(f"{case.name:<40}{args.requests / caller:>12,.0f}{(caller / baseline - 1) * 100:>9.1f}%"
+              f"{(total / baseline - 1) * 100:>9.1f}%")
+    out.close()
+    print(f"log file: {os.path.getsize(out.name) / 1e6:.1f} MB")
+    os.unlink(out.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Cost per recorded event of the metrics in metrics.py.
+
+Times, in nanoseconds per event (best of ``--repeat`` runs):
+
+- ``Counter.inc`` and ``Histogram.observe`` (what the hot paths call),
+- ``Family.labels(...).observe`` (a labelled histogram looked up per call,
+  as ``db_query_seconds`` is),
+- the ``time.perf_counter()`` pair around a timed section,
+- ``MetricsMiddleware`` around a minimal ASGI app, per request,
+- a lock-guarded histogram, for comparison with the per-thread cells,
+
+then records from ``--threads`` threads at once and checks that no count
+is lost, and times a scrape of the registry.
+
+    python benchmarks/bench_metrics.py --events 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+import timeit
+from bisect import bisect_left
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import DEFAULT_BUCKETS, MetricsMiddleware, Registry  # noqa: E402
+
+BUDGET_NS = 1000
+
+
+class LockedHistogram:
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+def per_event(fn, events: int, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=events, repeat=repeat)) / events * 1e9
+
+
+def middleware_cost(requests: int, repeat: int) -> float:
+    """Nanoseconds the middleware adds to a request that does nothing."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    timed = MetricsMiddleware(app, Registry().histogram("http_request_seconds", "", ["method", "route", "status"]))
+    scope = {"type": "http", "method": "GET", "path": "/"}
+
+    async def run(target):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(requests):
+                await target(scope, None, send)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    plain, instrumented = asyncio.run(run(app)), asyncio.run(run(timed))
+    return (instrumented - plain) / requests * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = registry.counter("events_total", "")
+    histogram = registry.histogram("event_seconds", "")
+    family = registry.histogram("query_seconds", "", ["operation"])
+    locked = LockedHistogram()
+    perf_counter = time.perf_counter
+    baseline = per_event(lambda: None, args.events, args.repeat)
+
+    def timed_section():
+        started = perf_counter()
+        return perf_counter() - started
+
+    cases = [
+        ("Counter.inc", lambda: counter.inc()),
+        ("Histogram.observe", lambda: histogram.observe(0.003)),
+        ("labels(...).observe", lambda: family.labels("insert_trade").observe(0.003)),
+        ("perf_counter pair", timed_section),
+        ("lock-guarded observe", lambda: locked.observe(0.003)),
+    ]
+    print(f"{'event':<28}{'ns/event':>10}  (call overhead of {baseline:.0f} ns subtracted, budget {BUDGET_NS} ns)")
+    for name, fn in cases:
+        print(f"{name:<28}{per_event(fn, args.events, args.repeat) - baseline:>10.0f}")
+    print(f"{'MetricsMiddleware request':<28}{middleware_cost(args.events // 20, args.repeat):>10.0f}")
+
+    shared = Registry().histogram("shared_seconds", "")
+    shared_counter = Registry().counter("shared_total", "")
+    per_thread = args.events // args.threads
+
+    def record():
+        for _ in range(per_thread):
+            shared.observe(0.002)
+            shared_counter.inc()
+
+    threads = [threading.Thread(target=record) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts, _ = shared.totals()
+    expected = per_thread * args.threads
+    print(f"{args.threads} threads x {per_thread:,} events: histogram {sum(counts):,}, counter "
+          f"{shared_counter.value:,} of {expected:,} ({'none lost' if sum(counts) == shared_counter.value == expected else 'LOST'})")
+
+    for i in range(50):
+        family.labels(f"operation_{i}").observe(0.001)
+    started = time.perf_counter()
+    body = registry.render()
+    print(f"scrape: {len(body.splitlines())} lines in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Serialization cost of the trade and alert responses, before and after serialization.py.
+
+- ``GET /trades`` pages: dicts through FastAPI's ``jsonable_encoder`` and
+  ``JSONResponse`` vs ``serialization.encode_rows`` (rows/s), and the ndjson
+  stream encoded per row with ``json.dumps`` vs ``encode_ndjson``,
+- ``POST /trades`` responses: ``TradeDB.__dict__`` through
+  ``jsonable_encoder`` vs ``trade_dict`` and ``FastJSONResponse``,
+- ``/ws`` batches: one ``json.dumps`` per subscriber vs one shared
+  ``AlertBatch`` message for every subscriber (messages/s).
+
+orjson is used by serialization.py when installed; the engine in use is
+printed first.
+
+    python benchmarks/bench_serialization.py --rows 10000 --clients 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import serialization  # noqa: E402
+from alert_hub import AlertBatch, make_alert  # noqa: E402
+from database import TradeDB  # noqa: E402
+from serialization import TRADE_FIELDS, FastJSONResponse, trade_dict  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    random.seed(1)
+    start = datetime(2025, 1, 2, 9, 30)
+    rows = []
+    for i in range(count):
+        timestamp = start + timedelta(milliseconds=i * 37)
+        # The selected fields, then the (timestamp, id) cursor columns build_trades_query appends
+        rows.append((i, random.choice(("AAPL", "MSFT", "GOOGL", "TSLA")), round(random.uniform(10, 500), 2),
+                     random.randint(1, 500), random.choice(("buy", "sell")), timestamp, timestamp, i))
+    return rows
+
+
+def rate(fn, count: int, repeat: int = 3) -> float:
+    """Best ``count / seconds`` of ``repeat`` runs of ``fn``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def old_rows_to_dicts(rows, fields):
+    return [{f: v.isoformat() if isinstance(v, datetime) else v for f, v in zip(fields, row)} for row in rows]
+
+
+def report(name: str, unit: str, before: float, after: float):
+    print(f"  {name:<34}{before:>14,.0f}{after:>14,.0f} {unit:<11}{after / before:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=1_000)
+    parser.add_argument("--alerts", type=int, default=20, help="alerts per /ws batch")
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"engine: {serialization.ENGINE}")
+    print(f"  {'':<34}{'before':>14}{'after':>14}")
+    rows = make_rows(args.rows)
+    fields = list(TRADE_FIELDS)
+
+    assert json.loads(JSONResponse(jsonable_encoder(old_rows_to_dicts(rows, fields))).body) == \
+        json.loads(serialization.encode_rows(rows, fields))
+    report("GET /trades json page", "rows/s",
+           rate(lambda: JSONResponse(jsonable_encoder(old_rows_to_dicts(rows, fields))).body, len(rows)),
+           rate(lambda: serialization.encode_rows(rows, fields), len(rows)))
+    report("GET /trades ndjson", "rows/s",
+           rate(lambda: "".join(json.dumps(d) + "\n" for d in old_rows_to_dicts(rows, fields)), len(rows)),
+           rate(lambda: serialization.encode_ndjson(rows, fields), len(rows)))
+
+    trades = [TradeDB(**dict(zip(TRADE_FIELDS, row))) for row in rows[:2000]]
+    report("POST /trades response", "responses/s",
+           rate(lambda: [JSONResponse(jsonable_encoder({"message": "Trade added successfully", "trade": t.__dict__}))
+                         for t in trades], len(trades)),
+           rate(lambda: [FastJSONResponse({"message": "Trade added successfully", "trade": trade_dict(t)})
+                         for t in trades], len(trades)))
+
+    batches = [[make_alert(f"T{random.randrange(500):03d}", round(random.uniform(10, 500), 2), 0.025)
+                for _ in range(args.alerts)] for _ in range(args.batches)]
+    messages = args.batches * args.clients
+
+    def per_subscriber():
+        for alerts in batches:
+            for _ in range(args.clients):
+                json.dumps({"type": "batch", "alerts": alerts})
+
+    def shared():
+        for alerts in batches:
+            batch = AlertBatch(alerts)
+            for _ in range(args.clients):
+                batch.message()
+
+    report(f"/ws, {args.clients} clients x {args.alerts} alerts", "messages/s",
+           rate(per_subscriber, messages, 1), rate(shared, messages, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Streaming SMA crossover signals: agreement with the backtest and per-tick cost.
+
+Streams historical_prices.csv one quote at a time (in date order, the way
+trades arrive) through an ``sma_cross`` rule and checks that the signals
+equal ``backtest.backtest`` for the same windows and cooldown. Then times
+ticks of ``--tickers`` quotes for growing window lengths: the update cost
+stays flat because each SMA is a running sum over a ring of prices.
+
+    python benchmarks/bench_signals.py --tickers 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest  # noqa: E402
+import columnar_store  # noqa: E402
+from alert_rules import RuleEngine  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def streamed_signals(history, fast: int, slow: int, cooldown: int) -> list:
+    engine = RuleEngine([{"type": "sma_cross", "fast": fast, "slow": slow, "cooldown_days": cooldown}])
+    row_tickers = history.tickers[history.row_ticker_ids()]
+    signals = []
+    for row in np.argsort(history.dates, kind="stable"):
+        price = history.closes[row]
+        for alert in engine.evaluate([str(row_tickers[row])], [price], timestamp=history.dates[row].item()):
+            signals.append({"date": alert["timestamp"][:10], "ticker": alert["ticker"],
+                            "action": alert["signal"], "price": float(price)})
+    return sorted(signals, key=lambda s: (s["date"], s["ticker"]))
+
+
+def tick_cost(tickers: int, slow: int, ticks: int) -> float:
+    engine = RuleEngine([{"type": "sma_cross", "fast": max(1, slow // 4), "slow": slow}])
+    codes = engine.ticker_codes([f"T{i:05d}" for i in range(tickers)])
+    rng = np.random.default_rng(1)
+    prices = np.full(tickers, 100.0)
+    for _ in range(min(slow, 50)):
+        prices *= 1 + rng.normal(0, 0.01, tickers)
+        engine.match(codes, prices)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        prices *= 1 + rng.normal(0, 0.01, tickers)
+        engine.match(codes, prices)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=os.path.join(ROOT, "historical_prices.csv"))
+    parser.add_argument("--tickers", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    history = columnar_store.load_price_history(args.path)
+    for fast, slow, cooldown in ((50, 200, 5), (10, 30, 0)):
+        expected = backtest.backtest(history, fast, slow, cooldown)["signals"]
+        start = time.perf_counter()
+        streamed = streamed_signals(history, fast, slow, cooldown)
+        elapsed = time.perf_counter() - start
+        print(f"SMA{fast}/SMA{slow} cooldown {cooldown}d: {len(streamed)} streamed signals from "
+              f"{len(history.closes):,} quotes in {elapsed:.2f}s, "
+              f"{'identical to' if streamed == expected else 'DIFFERENT FROM'} the backtest ({len(expected)})")
+
+    print(f"per-tick update, {args.tickers:,} tickers quoted per tick:")
+    for slow in (20, 200, 2000, 10000):
+        print(f"  slow window {slow:6}: {tick_cost(args.tickers, slow, args.ticks) * 1e6:7.0f} us per tick")
+
+
+if __name__ == "__main__":
+    main()
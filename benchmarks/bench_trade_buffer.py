@@ -0,0 +1,141 @@
+"""Memory per trade of the in-memory trade representations.
+
+Holds ``--trades`` synthetic trades as each representation the hot paths
+used or use and reports, with tracemalloc, the bytes and allocated blocks
+still held per trade, the transient peak while building them, and the
+build rate:
+
+- ``TradeDB`` ORM instances (what ``insert_trade``/``insert_trades`` return),
+- their ``__dict__`` payloads (the ``POST /trades`` response),
+- one-row DataFrames (the former ``save_trade_local``, measured on fewer
+  trades and scaled),
+- per-window deques of ``(timestamp, price)`` tuples (the former
+  ``RollingAverages``, windows 1m/5m/1h),
+- ``TradeBuffer`` columns fed through ``RollingAverages`` (now), in
+  batches of ``--batch`` trades (a group commit or ``/trades/batch``) and
+  one trade per call (``POST /trades``).
+
+Rates are taken with tracemalloc on, so they only compare the cases.
+
+    python benchmarks/bench_trade_buffer.py --trades 200000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from database import TradeDB  # noqa: E402
+from rolling_averages import DEFAULT_WINDOWS, RollingAverages, parse_windows  # noqa: E402
+from trade_buffer import TradeBuffer, to_epoch  # noqa: E402
+
+TICKERS = [f"T{i:03d}" for i in range(500)]
+
+
+def make_rows(count: int) -> list:
+    random.seed(1)
+    start = datetime(2025, 1, 2, 9, 30)
+    return [{"id": i, "ticker": random.choice(TICKERS), "price": round(random.uniform(10, 500), 2),
+             "quantity": random.randint(1, 500), "trade_type": random.choice(("buy", "sell")),
+             "timestamp": start + timedelta(milliseconds=i * 10)}
+            for i in range(count)]
+
+
+def measure(build, rows: list):
+    """Build ``build(rows)`` under tracemalloc; returns (result, retained bytes, retained blocks, peak bytes, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return result, current - base, blocks, peak - base, elapsed
+
+
+def orm_objects(rows):
+    return [TradeDB(**row) for row in rows]
+
+
+def dict_payloads(rows):
+    return [TradeDB(**row).__dict__ for row in rows]
+
+
+def one_row_frames(rows):
+    return [pd.DataFrame([row]) for row in rows]
+
+
+def tuple_deques(rows):
+    windows = parse_windows(DEFAULT_WINDOWS)
+    state = {}
+    for row in rows:
+        ts = to_epoch(row["timestamp"])
+        per_ticker = state.get(row["ticker"])
+        if per_ticker is None:
+            per_ticker = state[row["ticker"]] = {name: deque() for name in windows}
+        for name, seconds in windows.items():
+            trades = per_ticker[name]
+            trades.append((ts, row["price"]))
+            while trades[0][0] < ts - seconds:
+                trades.popleft()
+    return state
+
+
+class _Row:
+    __slots__ = ("ticker", "price", "quantity", "timestamp")
+
+    def __init__(self, row):
+        self.ticker, self.price, self.quantity, self.timestamp = (
+            row["ticker"], row["price"], row["quantity"], row["timestamp"])
+
+
+def trade_buffer(rows, batch: int = 1000):
+    averages = RollingAverages(parse_windows(DEFAULT_WINDOWS), TradeBuffer(keep_day=False))
+    for start in range(0, len(rows), batch):
+        averages.add_many(_Row(row) for row in rows[start:start + batch])
+    return averages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--frame-trades", type=int, default=2_000, help="trades for the one-row DataFrame case")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.trades)
+    span = (rows[-1]["timestamp"] - rows[0]["timestamp"]).total_seconds()
+    print(f"{args.trades:,} trades over {span / 60:.0f} minutes, {len(TICKERS)} tickers "
+          f"(the 1h window holds every trade)")
+    print(f"{'representation':<32}{'bytes/trade':>12}{'blocks/trade':>14}{'peak bytes/trade':>18}{'trades/s':>12}")
+    cases = [("TradeDB instances", orm_objects, rows), ("__dict__ payloads", dict_payloads, rows),
+             ("one-row DataFrames", one_row_frames, rows[:args.frame_trades]),
+             ("deques of tuples (1m/5m/1h)", tuple_deques, rows),
+             (f"TradeBuffer, batches of {args.batch}", lambda r: trade_buffer(r, args.batch), rows),
+             ("TradeBuffer, one per call", lambda r: trade_buffer(r, 1), rows[:args.trades // 10])]
+    for name, build, subset in cases:
+        result, retained, blocks, peak, elapsed = measure(build, subset)
+        count = len(subset)
+        print(f"{name:<32}{retained / count:>12.0f}{blocks / count:>14.2f}{peak / count:>18.0f}{count / elapsed:>12,.0f}")
+        if isinstance(result, RollingAverages) and count == len(rows):
+            buffer = result.buffer
+            print(f"  buffer: {len(buffer):,} trades in {buffer.nbytes / 1e6:.1f} MB of columns "
+                  f"({buffer.nbytes / len(buffer):.1f} bytes per held trade incl. spare capacity)")
+        del result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Sustained insert rate of the local trade journal.
+
+Writes one day's worth of trades into a scratch directory and reports the
+insert rate for every block of trades, so a rate that drops as the partition
+grows is easy to spot. ``--workers`` runs that many processes against the
+same partition to check that concurrent writers neither lose rows nor write
+duplicate headers. ``--legacy`` also times the old read-modify-write path for
+the first few thousand trades for comparison.
+
+    python benchmarks/bench_trade_journal.py --trades 200000 --workers 4
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Process
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trade_journal import TradeJournal, partition_path  # noqa: E402
+
+DAY = datetime(2025, 6, 5)
+TICKERS = ["AAPL", "GOOGL", "MSFT", "TSLA"]
+
+
+def make_trade(i: int, worker: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=worker * 10_000_000 + i,
+        ticker=TICKERS[i % len(TICKERS)],
+        price=150.0 + (i % 100) / 10,
+        quantity=1 + i % 50,
+        trade_type="buy" if i % 2 else "sell",
+        timestamp=DAY + timedelta(microseconds=i * 400),
+    )
+
+
+def write_trades(base_dir: str, count: int, block: int, worker: int = 0, report: bool = True):
+    journal = TradeJournal(base_dir)
+    start = block_start = time.perf_counter()
+    for i in range(count):
+        journal.append(make_trade(i, worker))
+        if report and (i + 1) % block == 0:
+            now = time.perf_counter()
+            print(f"  trades {i + 1 - block:>8}-{i + 1:<8} {block / (now - block_start):>12,.0f} trades/s")
+            block_start = now
+    journal.close()
+    return time.perf_counter() - start
+
+
+def legacy_write(base_dir: str, count: int):
+    import pandas as pd
+
+    path = partition_path(base_dir, DAY)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = time.perf_counter()
+    for i in range(count):
+        t = make_trade(i)
+        new_df = pd.DataFrame([{**vars(t), "timestamp": t.timestamp.isoformat()}])
+        if os.path.exists(path):
+            new_df = pd.concat([pd.read_csv(path), new_df], ignore_index=True)
+        new_df.to_csv(path, index=False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=150_000, help="trades per worker")
+    parser.add_argument("--block", type=int, default=25_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--legacy", type=int, default=0, help="trades to write with the old path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        print(f"Journal, {args.workers} worker(s) x {args.trades:,} trades")
+        if args.workers == 1:
+            elapsed = write_trades(base_dir, args.trades, args.block)
+        else:
+            procs = [Process(target=write_trades, args=(base_dir, args.trades, args.block, w, w == 0))
+                     for w in range(args.workers)]
+            start = time.perf_counter()
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+            elapsed = time.perf_counter() - start
+        total = args.trades * args.workers
+        print(f"  total {total:,} trades in {elapsed:.2f}s ({total / elapsed:,.0f} trades/s)")
+
+        with open(partition_path(base_dir, DAY), newline="") as f:
+            rows = list(csv.reader(f))
+        headers = sum(1 for r in rows if r and r[0] == "id")
+        print(f"  file rows: {len(rows) - headers:,}, header lines: {headers}")
+        assert len(rows) - headers == total and headers == 1
+
+    if args.legacy:
+        with tempfile.TemporaryDirectory() as base_dir:
+            elapsed = legacy_write(base_dir, args.legacy)
+            print(f"Legacy read-modify-write, {args.legacy:,} trades: {elapsed:.2f}s "
+                  f"({args.legacy / elapsed:,.0f} trades/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ from sqlalchemy import create_engine, func, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 
+from log_setup import configure_logging
+
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+configure_logging()
 
 # Redis Configuration
 REDIS_HOST = 'localhost'
@@ -56,10 +58,6 @@ def calculate_averages():
     logger.debug("Starting calculate_averages task")
     db = SessionLocal()
     try:
-        # Debug: Check all trades
-        all_trades = db.query(TradeDB).all()
-        logger.debug(f"Found {len(all_trades)} total trades: {[t.__dict__ for t in all_trades]}")
-        
         # Use latest trade timestamp for window
         latest_trade = db.query(TradeDB).order_by(TradeDB.timestamp.desc()).first()
         if not latest_trade:
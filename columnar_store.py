@@ -0,0 +1,205 @@
+"""Memory-mapped columnar copies of the CSV data files.
+
+Each CSV gets a sibling ``.columnar/<name>/`` directory holding one ``.npy``
+file per column plus ``meta.json`` recording the source file's size and
+mtime. Loads map the ``.npy`` files read-only and keep the decoded arrays in
+an in-process LRU cache of ``COLUMNAR_CACHE_SIZE`` files, so repeated
+simulations and analyses neither parse text nor copy data. A changed source
+file is converted again on next use.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import PriceHistory
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_DIRNAME = ".columnar"
+# Partitions written to this recently are still being appended to; reading
+# the CSV is cheaper than converting them on every request.
+HOT_PARTITION_SECONDS = float(os.getenv("HOT_PARTITION_SECONDS", "60"))
+
+# Loaded files kept in memory, least recently used dropped first
+COLUMNAR_CACHE_SIZE = int(os.getenv("COLUMNAR_CACHE_SIZE", "64"))
+
+_cache: "OrderedDict[str, Tuple[Tuple[int, int], object]]" = OrderedDict()
+# Per-file [lock, users]: a conversion only blocks loads of the same file
+_key_locks: Dict[str, List] = {}
+_lock = threading.Lock()
+
+
+def parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse ISO 8601 strings (with or without offset) to naive UTC timestamps."""
+    try:
+        parsed = pd.to_datetime(values, utc=True, format="ISO8601")
+    except (TypeError, ValueError):
+        parsed = pd.to_datetime(values, utc=True)
+    return parsed.dt.tz_localize(None)
+
+
+def columnar_dir(csv_path: str) -> str:
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), COLUMNAR_DIRNAME, name)
+
+
+def _signature(csv_path: str) -> Tuple[int, int]:
+    st = os.stat(csv_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _write_columns(target: str, columns: Dict[str, np.ndarray], signature: Tuple[int, int]):
+    tmp = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name, array in columns.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), array, allow_pickle=False)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"mtime_ns": signature[0], "size": signature[1], "columns": list(columns)}, f)
+    if os.path.isdir(target):
+        old = f"{target}.old-{os.getpid()}-{threading.get_ident()}"
+        os.replace(target, old)
+        os.replace(tmp, target)
+        for name in os.listdir(old):
+            os.remove(os.path.join(old, name))
+        os.rmdir(old)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp, target)
+
+
+def _read_columns(target: str, signature: Tuple[int, int]) -> Optional[Dict[str, np.ndarray]]:
+    try:
+        with open(os.path.join(target, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (meta.get("mtime_ns"), meta.get("size")) != signature:
+        return None
+    return {name: np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+            for name in meta["columns"]}
+
+
+def _cached(key: str, signature: Tuple[int, int]):
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == signature:
+            _cache.move_to_end(key)
+            return cached[1]
+        return None
+
+
+def _store(key: str, signature: Tuple[int, int], value):
+    with _lock:
+        _cache[key] = (signature, value)
+        _cache.move_to_end(key)
+        while len(_cache) > COLUMNAR_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+@contextlib.contextmanager
+def _key_lock(key: str):
+    with _lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+def _load(csv_path: str, convert: Callable[[str], Dict[str, np.ndarray]],
+          build: Callable[[Dict[str, np.ndarray]], object]):
+    signature = _signature(csv_path)
+    key = os.path.abspath(csv_path)
+    value = _cached(key, signature)
+    if value is not None:
+        return value
+    with _key_lock(key):
+        # Another thread may have loaded it while we waited
+        value = _cached(key, signature)
+        if value is not None:
+            return value
+        target = columnar_dir(csv_path)
+        columns = _read_columns(target, signature)
+        if columns is None:
+            started = time.perf_counter()
+            _write_columns(target, convert(csv_path), signature)
+            columns = _read_columns(target, signature)
+            logger.debug(f"Converted {csv_path} to columnar in {time.perf_counter() - started:.3f}s")
+        value = build(columns)
+        _store(key, signature, value)
+        return value
+
+
+def _encode(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int32), np.asarray(uniques, dtype=str)
+
+
+def _convert_prices(csv_path: str) -> Dict[str, np.ndarray]:
+    history = PriceHistory.from_frame(pd.read_csv(csv_path))
+    return {"tickers": history.tickers.astype(str), "starts": history.starts.astype(np.int64),
+            "dates": history.dates, "closes": history.closes}
+
+
+def load_price_history(csv_path: str) -> PriceHistory:
+    return _load(csv_path, _convert_prices,
+                 lambda c: PriceHistory(c["tickers"], c["starts"], c["dates"], c["closes"]))
+
+
+def _convert_trades(csv_path: str) -> Dict[str, np.ndarray]:
+    df = pd.read_csv(csv_path)
+    ticker_codes, tickers = _encode(df["ticker"])
+    type_codes, trade_types = _encode(df["trade_type"])
+    return {
+        "id": df["id"].to_numpy(dtype=np.int64),
+        "ticker_code": ticker_codes,
+        "tickers": tickers,
+        "price": df["price"].to_numpy(dtype=np.float64),
+        "quantity": df["quantity"].to_numpy(dtype=np.int64),
+        "trade_type_code": type_codes,
+        "trade_types": trade_types,
+        "timestamp": parse_timestamps(df["timestamp"]).to_numpy().astype("datetime64[us]"),
+    }
+
+
+def _build_trades_frame(c: Dict[str, np.ndarray]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": c["id"],
+        "ticker": pd.Categorical.from_codes(c["ticker_code"], categories=list(c["tickers"])),
+        "price": c["price"],
+        "quantity": c["quantity"],
+        "trade_type": pd.Categorical.from_codes(c["trade_type_code"], categories=list(c["trade_types"])),
+        "timestamp": c["timestamp"],
+    }, copy=False)
+
+
+def load_trades_frame(csv_path: str) -> pd.DataFrame:
+    """Trades of one trades_data day partition as a DataFrame.
+
+    Partitions modified in the last ``HOT_PARTITION_SECONDS`` are read from
+    the CSV directly; older ones come from the columnar copy.
+    """
+    if time.time() - os.path.getmtime(csv_path) < HOT_PARTITION_SECONDS:
+        df = pd.read_csv(csv_path)
+        if "timestamp" in df.columns:
+            df["timestamp"] = parse_timestamps(df["timestamp"])
+        return df
+    return _load(csv_path, _convert_trades, _build_trades_frame)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -1,77 +1,63 @@
+import csv
+import io
 import json
-import pandas as pd
-import boto3
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
 import logging
-from botocore.exceptions import ClientError
+from analytics import DEFAULT_CHUNK_ROWS, DirectoryObjectClient, S3Backend, analyze_days, partition_key
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 AWS_REGION = "ap-south-1"  # Hardcoded to avoid env var issues
 S3_BUCKET = "trading-system-trades-1234"
-s3_client = boto3.client("s3", region_name=AWS_REGION)
+# S3_ENDPOINT_URL points boto3 at an S3-compatible stand-in (moto server, MinIO);
+# S3_LOCAL_DIR reads <dir>/<bucket>/YYYY/MM/DD/trades.csv without any S3 API
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_LOCAL_DIR = os.getenv("S3_LOCAL_DIR")
+# Downloaded partitions stay in /tmp across warm invocations
+S3_CACHE_DIR = os.getenv("S3_CACHE_DIR", "/tmp/trades-cache")
+S3_CACHE_BYTES = int(os.getenv("S3_CACHE_BYTES", str(400 * 1024 * 1024)))
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+MAX_RANGE_DAYS = 366
+ANALYZE_CHUNK_ROWS = int(os.getenv("ANALYZE_CHUNK_ROWS", str(DEFAULT_CHUNK_ROWS)))
+# lean parses with the csv module and NumPy; pandas gives the same result but costs its import at cold start
+ANALYZE_ENGINE = os.getenv("ANALYZE_ENGINE", "lean")
+# Created once per container; boto3 is only imported when S3 is first contacted
+trade_storage = S3Backend(
+    S3_BUCKET, DirectoryObjectClient(S3_LOCAL_DIR) if S3_LOCAL_DIR else None, AWS_REGION,
+    cache_dir=S3_CACHE_DIR or None, cache_bytes=S3_CACHE_BYTES, part_size=S3_PART_SIZE,
+    max_concurrency=S3_MAX_CONCURRENCY, endpoint_url=S3_ENDPOINT_URL
+)
 
-def get_trades_from_s3(date: str) -> pd.DataFrame:
-    try:
-        analysis_date = datetime.strptime(date, "%Y-%m-%d")
-        s3_key = f"{analysis_date.strftime('%Y/%m/%d')}/trades.csv"
-        logger.info(f"Fetching trades from s3://{S3_BUCKET}/{s3_key}")
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=s3_key)
-        df = pd.read_csv(response['Body'])
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        logger.info(f"Found {len(df)} trades for {date}")
-        return df
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            logger.info(f"No trades found for {date}")
-            return pd.DataFrame()
-        logger.error(f"S3 access error: {str(e)}")
-        raise
-    except Exception as e:
-        logger.error(f"Error reading trades CSV: {str(e)}")
-        raise
-
-def analyze_trades(df: pd.DataFrame, date: str) -> dict:
-    if df.empty:
-        return {
-            "date": date,
-            "total_volume": 0,
-            "average_price": 0,
-            "trade_count": 0,
-            "top_tickers": []
-        }
-    
-    analysis = df.groupby("ticker").agg({
-        "quantity": ["sum", "count"],
-        "price": "mean"
-    }).reset_index()
-    analysis.columns = ['ticker', 'total_volume', 'trade_count', 'avg_price']
-    
-    total_volume = analysis["total_volume"].sum()
-    weighted_avg_price = (analysis["avg_price"] * analysis["total_volume"]).sum() / total_volume if total_volume else 0
-    
-    top_tickers = analysis.sort_values("total_volume", ascending=False).head(10)
-    top_tickers = top_tickers.where(pd.notnull(top_tickers), None)
-    
-    return {
-        "date": date,
-        "total_volume": int(total_volume),
-        "average_price": round(float(weighted_avg_price), 2),
-        "trade_count": int(analysis["trade_count"].sum()),
-        "top_tickers": top_tickers.to_dict('records')
-    }
+def analyze_trades_from_s3(date: str, end_date: str = None) -> dict:
+    """Analyse the trades of ``date`` (through ``end_date`` if given), fetching the days concurrently."""
+    start = datetime.strptime(date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else start
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    logger.info(f"Fetching trades from s3://{S3_BUCKET}/{partition_key(start)} ({len(days)} days)")
+    analysis = analyze_days(trade_storage, days, ANALYZE_CHUNK_ROWS, workers=S3_MAX_CONCURRENCY,
+                            engine=ANALYZE_ENGINE).result(date)
+    if end_date:
+        analysis["end_date"] = end_date
+    logger.info(f"Found {analysis['trade_count']} trades for {date}, storage {trade_storage.stats}")
+    return analysis
 
 def save_analysis_results(date: str, analysis: dict) -> bool:
     try:
         analysis_date = datetime.strptime(date, "%Y-%m-%d")
         s3_key = f"{analysis_date.strftime('%Y/%m/%d')}/analysis_{date}.csv"
-        analysis_df = pd.DataFrame(analysis['top_tickers'])
-        s3_client.put_object(
+        rows = analysis['top_tickers']
+        body = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(body, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        trade_storage.client.put_object(
             Bucket=S3_BUCKET,
             Key=s3_key,
-            Body=analysis_df.to_csv(index=False),
+            Body=body.getvalue(),
             ContentType='text/csv'
         )
         logger.info(f"Analysis saved to s3://{S3_BUCKET}/{s3_key}")
@@ -83,14 +69,18 @@ def save_analysis_results(date: str, analysis: dict) -> bool:
 def lambda_handler(event, context):
     try:
         logger.info(f"Received event: {json.dumps(event)}")
-        date = event.get("queryStringParameters", {}).get("date") or datetime.utcnow().strftime("%Y-%m-%d")
+        params = event.get("queryStringParameters") or {}
+        date = params.get("date") or datetime.utcnow().strftime("%Y-%m-%d")
+        end_date = params.get("end_date")
         
         try:
-            datetime.strptime(date, "%Y-%m-%d")
+            start = datetime.strptime(date, "%Y-%m-%d")
+            if end_date and not 0 <= (datetime.strptime(end_date, "%Y-%m-%d") - start).days < MAX_RANGE_DAYS:
+                raise ValueError(end_date)
         except ValueError:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "Invalid date format. Use YYYY-MM-DD"}),
+                "body": json.dumps({"error": f"Invalid date format. Use YYYY-MM-DD (end_date within {MAX_RANGE_DAYS} days of date)"}),
                 "headers": {
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "http://localhost:3000",
@@ -99,11 +89,8 @@ def lambda_handler(event, context):
                 }
             }
         
-        trades_df = get_trades_from_s3(date)
-        analysis_result = analyze_trades(trades_df, date)
-        save_analysis_results(date, analysis_result)
-        
-        return {
+        analysis_result = analyze_trades_from_s3(date, end_date)
+        response = {
             "statusCode": 200,
             "body": json.dumps(analysis_result),
             "headers": {
@@ -113,6 +100,10 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Headers": "*"
             }
         }
+        # Written before returning: Lambda freezes the container once the handler returns
+        if not end_date:
+            save_analysis_results(date, analysis_result)
+        return response
     except Exception as e:
         logger.error(f"Error in lambda_handler: {str(e)}")
         return {
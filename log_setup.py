@@ -0,0 +1,234 @@
+"""Logging off the request path.
+
+``configure_logging`` puts one ``AsyncQueueHandler`` on the root logger. A
+record is only built and queued on the calling thread (the event loop or
+a DB thread); a background ``QueueListener`` thread formats and writes
+it. Log with ``%``-style arguments (``logger.debug("Sent %d alerts", n)``)
+so nothing is formatted on the caller, or at all when the record is
+dropped; arguments are formatted on the writer thread, so do not pass
+objects that are mutated right after the call.
+
+Module loggers become ``GatedLogger``s, which decide before building a
+record, per call site (logger name and message template):
+
+- DEBUG records are sampled: 1 of every ``LOG_DEBUG_SAMPLE`` is kept,
+- at most ``LOG_RATE_LIMIT`` records per second are kept (a token bucket
+  with a burst of the same size); the next record that gets through
+  reports how many were suppressed.
+
+When ``LOG_QUEUE_SIZE`` records are already waiting a record is dropped
+rather than blocking the caller.
+
+``LOG_FORMAT=json`` writes one JSON object per line (time, level, logger,
+message, any ``extra`` fields, the suppressed count and the traceback);
+``text`` keeps the ``asctime - levelname - message`` lines. The level is
+``LOG_LEVEL`` at startup and can be changed at runtime with ``set_level``.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+FORMATS = ("text", "json")
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime",
+                                                                                      "suppressed"}
+
+
+class CallSiteLimiter:
+    """DEBUG sampling and a per-second rate limit per call site (logger name and message template).
+
+    ``check`` runs on the thread that logs, without a lock: a race between
+    threads can at worst let one extra record through. Message templates
+    are keys, so f-string messages each count as their own site; the table
+    is cleared when it holds ``max_sites``.
+    """
+
+    def __init__(self, debug_sample: int = 1, rate_limit: float = 0.0, max_sites: int = 4096):
+        self.debug_sample = max(1, debug_sample)
+        self.rate_limit = rate_limit
+        self.max_sites = max_sites
+        # call site -> [records seen, tokens, last refill, suppressed since the last record let through,
+        #               time the next token is due while the bucket is empty]
+        self._sites: Dict[tuple, list] = {}
+        self.sampled_out = 0
+        self.suppressed = 0
+
+    def check(self, site: tuple, level: int) -> int:
+        """-1 to drop the record, otherwise the number of records suppressed at ``site`` since the last one."""
+        state = self._sites.get(site)
+        now = time.monotonic()
+        if state is None:
+            if len(self._sites) >= self.max_sites:
+                self._sites.clear()
+            state = self._sites[site] = [0, self.rate_limit, now, 0, now]
+        seen = state[0]
+        state[0] = seen + 1
+        if level <= logging.DEBUG and seen % self.debug_sample:
+            self.sampled_out += 1
+            return -1
+        if self.rate_limit <= 0:
+            return 0
+        if now < state[4]:
+            state[3] += 1
+            self.suppressed += 1
+            return -1
+        tokens = min(self.rate_limit, state[1] + (now - state[2]) * self.rate_limit)
+        state[2] = now
+        if tokens < 1:
+            state[1] = tokens
+            state[4] = now + (1 - tokens) / self.rate_limit
+            state[3] += 1
+            self.suppressed += 1
+            return -1
+        state[1] = tokens - 1
+        suppressed, state[3] = state[3], 0
+        return suppressed
+
+
+class GatedLogger(logging.Logger):
+    """Logger that asks ``limiter`` before a record is built, so a dropped record costs a dict lookup."""
+
+    limiter: Optional[CallSiteLimiter] = None
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+        limiter = GatedLogger.limiter
+        if limiter is not None:
+            suppressed = limiter.check((self.name, msg), level)
+            if suppressed < 0:
+                return
+            if suppressed:
+                extra = dict(extra or (), suppressed=suppressed)
+        # One more frame (this one) between the caller and findCaller
+        super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Queues records unformatted on a ``SimpleQueue``, dropping them when ``max_pending`` are waiting."""
+
+    def __init__(self, max_pending: int = 10000):
+        super().__init__(queue.SimpleQueue())
+        self.max_pending = max_pending
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord):
+        # Handler.handle would take the handler lock; SimpleQueue.put needs none
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):
+            record = result
+        if result:
+            self.emit(record)
+        return result
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{text} ({suppressed} similar messages suppressed)" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _LogState:
+    def __init__(self):
+        self.handler: Optional[AsyncQueueHandler] = None
+        self.limiter: Optional[CallSiteLimiter] = None
+        self.listener: Optional[QueueListener] = None
+        self.format = "text"
+
+
+_state = _LogState()
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """Route the root logger through the background writer; later calls keep the first setup."""
+    if _state.handler is not None:
+        return
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format: {fmt}")
+    writer = logging.StreamHandler()
+    writer.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT))
+    handler = AsyncQueueHandler(int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    limiter = CallSiteLimiter(int(os.getenv("LOG_DEBUG_SAMPLE", "1")), float(os.getenv("LOG_RATE_LIMIT", "50")))
+    GatedLogger.limiter = limiter
+    logging.setLoggerClass(GatedLogger)
+    # Module loggers created before this call
+    for existing in list(logging.Logger.manager.loggerDict.values()):
+        if type(existing) is logging.Logger:
+            existing.__class__ = GatedLogger
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "DEBUG")).upper())
+    listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+    listener.start()
+    _state.handler, _state.limiter, _state.listener, _state.format = handler, limiter, listener, fmt
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write what is queued and stop the writer thread."""
+    if _state.listener is not None:
+        _state.listener.stop()
+        _state.listener = None
+
+
+def set_level(level: str, name: Optional[str] = None) -> str:
+    """Set the level of logger ``name`` (the root logger by default); returns the level set."""
+    level = level.upper()
+    if not isinstance(logging.getLevelName(level), int):
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger(name).setLevel(level)
+    return level
+
+
+def log_stats() -> dict:
+    handler, limiter = _state.handler, _state.limiter
+    return {
+        "level": logging.getLevelName(logging.getLogger().level),
+        "format": _state.format,
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "suppressed": limiter.suppressed if limiter else 0,
+        "sampled_out": limiter.sampled_out if limiter else 0,
+        "debug_sample": limiter.debug_sample if limiter else 1,
+        "rate_limit": limiter.rate_limit if limiter else 0.0
+    }
@@ -0,0 +1,287 @@
+"""Prometheus metrics, cheap enough to record on every trade, query and send.
+
+Metrics are registered in ``registry`` and rendered in the Prometheus text
+format (version 0.0.4) by ``Registry.render``, served on ``GET /metrics``.
+
+Recording takes no lock: counters and histograms keep their cells per
+thread (the event loop, each DB thread), a thread only adds to its own
+and a scrape sums them. When a thread exits its cells are folded into the
+metric's base totals and dropped. A histogram finds its bucket with ``bisect`` and
+keeps per-bucket counts, made cumulative only when scraped. A labelled
+metric keeps one child per label values in a dict, so
+``histogram.labels("insert_trade")`` is a lookup; hold on to the child
+where the labels are fixed. Gauges, and totals other objects already keep
+(queue depths, cache counters), are callbacks read at scrape time and
+free in between.
+"""
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Starlette appends "; charset=utf-8" to text/ media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds, from a fast in-memory call to a slow query
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+# Queued batches per WebSocket subscriber
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+
+class _Shard:
+    __slots__ = ("values", "__weakref__")
+
+
+class _Shards:
+    """Every live thread's cells of one metric, plus the totals of threads that have exited."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.base = [0] * size
+        self._live: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self) -> _Shard:
+        shard = _Shard()
+        shard.values = [0] * self.size
+        with self._lock:
+            self._live[id(shard.values)] = shard.values
+        # The thread-local dict holding the shard is cleared when its thread exits
+        weakref.finalize(shard, self._fold, shard.values)
+        return shard
+
+    def _fold(self, values: list):
+        with self._lock:
+            del self._live[id(values)]
+            for i, value in enumerate(values):
+                self.base[i] += value
+
+    def totals(self) -> list:
+        with self._lock:
+            return [sum(column) for column in zip(self.base, *self._live.values())]
+
+
+class _Cells(threading.local):
+    """One thread's cells of a metric. A thread only ever writes its own, so recording takes no lock."""
+
+    def __init__(self, shards: _Shards):
+        self.shard = shards.add()
+        self.values = self.shard.values
+
+
+class Counter:
+    """Monotonic total."""
+
+    __slots__ = ("_cells", "_shards")
+
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._cells = _Cells(self._shards)
+
+    def inc(self, amount=1):
+        self._cells.values[0] += amount
+
+    @property
+    def value(self):
+        return self._shards.totals()[0]
+
+    def samples(self, name: str, labels: str) -> Iterator[Tuple[str, str, float]]:
+        yield name, labels, self.value
+
+
+class Histogram:
+    """Counts of observations per bucket (upper bounds ``bounds``, plus +Inf) and their sum.
+
+    Each thread's cells are the bucket counts followed by the sum.
+    """
+
+    __slots__ = ("bounds", "_cells", "_shards")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._shards = _Shards(len(self.bounds) + 2)
+        self._cells = _Cells(self._shards)
+
+    def observe(self, value: float):
+        values = self._cells.values
+        values[bisect_left(self.bounds, value)] += 1
+        values[-1] += value
+
+    def totals(self) -> Tuple[List[int], float]:
+        """Per-bucket counts and the sum over all threads."""
+        totals = self._shards.totals()
+        return totals[:-1], totals[-1]
+
+    def samples(self, name: str, labels: str) -> Iterator[Tuple[str, str, float]]:
+        counts, total = self.totals()
+        sep = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            yield f"{name}_bucket", f'{labels}{sep}le="{_format(float(bound))}"', cumulative
+        yield f"{name}_sum", labels, float(total)
+        yield f"{name}_count", labels, cumulative
+
+
+class Family:
+    """A labelled metric: one child (``Counter`` or ``Histogram``) per label values."""
+
+    def __init__(self, labelnames: Sequence[str], factory: Callable[[], object]):
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Expected labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self) -> List[Tuple[tuple, object]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class _Callback:
+    """Samples read from ``fn`` at scrape time: a number, or ``{label values: number}`` with labels."""
+
+    def __init__(self, labelnames: Sequence[str], fn: Callable):
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def children(self) -> List[Tuple[tuple, object]]:
+        values = self.fn()
+        if not self.labelnames:
+            values = {(): values}
+        return [(key if isinstance(key, tuple) else (key,), _Value(value)) for key, value in values.items()]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def samples(self, name: str, labels: str) -> Iterator[Tuple[str, str, float]]:
+        yield name, labels, self.value
+
+
+class Registry:
+    """Named metrics and their Prometheus text rendering."""
+
+    def __init__(self):
+        self._metrics: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name: str, documentation: str, kind: str, labelnames: Sequence[str], factory):
+        metric = Family(labelnames, factory) if labelnames else factory()
+        self._add(name, documentation, kind, metric)
+        return metric
+
+    def _add(self, name: str, documentation: str, kind: str, metric):
+        with self._lock:
+            if name in self._metrics:
+                raise ValueError(f"Metric {name} is already registered")
+            self._metrics[name] = (documentation, kind, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """A ``Counter``, or a ``Family`` of them when ``labelnames`` are given."""
+        return self._register(name, documentation, "counter", labelnames, Counter)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS):
+        return self._register(name, documentation, "histogram", labelnames, lambda: Histogram(buckets))
+
+    def callback(self, name: str, documentation: str, fn: Callable, kind: str = "gauge",
+                 labelnames: Sequence[str] = ()):
+        """Expose a value kept elsewhere (``kind`` gauge or counter), read by ``fn()`` on every scrape."""
+        self._add(name, documentation, kind, _Callback(labelnames, fn))
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> bytes:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, (documentation, kind, metric) in metrics:
+            lines.append(f"# HELP {name} {_escape_help(documentation)}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(metric, (Family, _Callback)):
+                children = [(_labels(metric.labelnames, values), child) for values, child in metric.children()]
+            else:
+                children = [("", metric)]
+            for labels, child in children:
+                for sample, sample_labels, value in child.samples(name, labels):
+                    label_text = f"{{{sample_labels}}}" if sample_labels else ""
+                    lines.append(f"{sample}{label_text} {_format(value)}")
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+
+def _format(value) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    return ",".join(
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    )
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing every HTTP request's duration in ``histogram``.
+
+    ``histogram`` is a ``Family`` labelled (method, route, status); the route
+    is the matched path template (``/positions/{ticker}``), so the label
+    values stay bounded, or ``unmatched``. Streaming responses are timed to
+    their last chunk.
+    """
+
+    def __init__(self, app, histogram: Family):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.histogram.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
@@ -0,0 +1,351 @@
+"""Per-ticker positions and profit/loss, folded from the trade stream.
+
+``PositionLedger.apply`` folds one committed trade (``buy`` or ``sell``,
+any case; other trade types are counted and ignored) into the ticker's
+net position, average cost and realized P/L using the average cost
+method: adding to a position moves the average cost, reducing it realizes
+``(price - average cost) * quantity`` (reversed for shorts) and a trade
+through zero opens the remainder at the trade price.
+
+Open positions are marked against the latest price from the alert feed
+(``mark``), or the last trade price until the feed has quoted the ticker.
+Portfolio totals are kept as running sums, so every query is O(1) per
+ticker and O(1) for the totals.
+
+Trade ids are handed out before commit, so concurrent inserts (and other
+worker processes) can commit them out of order. The ledger keeps a
+watermark, ``last_id``, below which every trade has been folded, and the
+folded ids above it; a scan of ``id > last_id`` followed by ``settle``
+folds whatever is missing and skips the rest. An id still missing ``gap_timeout`` seconds
+after a scan passed it belongs to a rolled back insert and the watermark
+moves past it; should it commit within another ``gap_timeout`` after all,
+it is still folded.
+
+The ledger is saved to a JSON snapshot with the watermark and the folded
+ids above it; on startup the snapshot is loaded and the trades above the
+watermark are replayed, in id order. ``SnapshotLock`` lets one process
+write the snapshot when several share it.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process writes the snapshot
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+
+class _Position:
+    __slots__ = ("quantity", "avg_cost", "realized", "mark", "mark_source", "trades", "bought", "sold")
+
+    def __init__(self):
+        self.quantity = 0
+        self.avg_cost = 0.0
+        self.realized = 0.0
+        self.mark: Optional[float] = None
+        self.mark_source: Optional[str] = None
+        self.trades = 0
+        self.bought = 0
+        self.sold = 0
+
+    @property
+    def unrealized(self) -> float:
+        if not self.quantity or self.mark is None:
+            return 0.0
+        return (self.mark - self.avg_cost) * self.quantity
+
+    @property
+    def market_value(self) -> float:
+        return self.quantity * self.mark if self.quantity and self.mark is not None else 0.0
+
+    def fill(self, quantity: int, price: float) -> float:
+        """Apply a signed fill (buys positive) and return the P/L it realized."""
+        held = self.quantity
+        realized = 0.0
+        if held and (held > 0) != (quantity > 0):
+            closed = min(abs(held), abs(quantity))
+            realized = (price - self.avg_cost) * closed * (1 if held > 0 else -1)
+            self.realized += realized
+        total = held + quantity
+        if not total:
+            self.avg_cost = 0.0
+        elif (held >= 0) == (quantity > 0) and held:
+            self.avg_cost = (self.avg_cost * held + price * quantity) / total
+        elif not held or (total > 0) != (held > 0):
+            self.avg_cost = price
+        self.quantity = total
+        return realized
+
+    def to_dict(self) -> dict:
+        return {
+            "quantity": self.quantity,
+            "avg_cost": self.avg_cost,
+            "realized": self.realized,
+            "mark": self.mark,
+            "mark_source": self.mark_source,
+            "trades": self.trades,
+            "bought": self.bought,
+            "sold": self.sold
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "_Position":
+        position = cls()
+        for name in cls.__slots__:
+            setattr(position, name, values.get(name, getattr(position, name)))
+        return position
+
+
+class PositionLedger:
+    """Net position, average cost and realized/unrealized P/L per ticker.
+
+    ``apply``/``apply_many`` may run on DB threads and ``mark`` on the event
+    loop, so both take the ledger lock. A trade whose id was already folded
+    is skipped, so a scan may overlap the live trades.
+    """
+
+    def __init__(self, gap_timeout: float = 300.0):
+        self._positions: Dict[str, _Position] = {}
+        self._lock = threading.Lock()
+        self.gap_timeout = gap_timeout
+        # Every trade with id <= last_id is folded (or was never committed)
+        self.last_id = 0
+        self._folded_ids = set()
+        # Missing id -> monotonic time a scan first passed it
+        self._gaps: Dict[int, float] = {}
+        # Ids the watermark moved past without folding them -> time given up
+        self._given_up: Dict[int, float] = {}
+        self.folded = 0
+        self.ignored = 0
+        self._reset_totals()
+
+    def _reset_totals(self):
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self.market_value = 0.0
+        self.open_positions = 0
+        self.trades = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def apply(self, trade):
+        """Fold one trade (anything with ticker, price, quantity, trade_type and id)."""
+        with self._lock:
+            self._apply(trade)
+
+    def apply_many(self, trades: Iterable):
+        with self._lock:
+            for trade in trades:
+                self._apply(trade)
+
+    def _apply(self, trade):
+        trade_id = trade.id
+        if trade_id is not None:
+            if trade_id > self.last_id:
+                if trade_id in self._folded_ids:
+                    return
+                self._folded_ids.add(trade_id)
+                self._advance()
+            elif self._given_up.pop(trade_id, None) is None:
+                return
+        self.folded += 1
+        side = (trade.trade_type or "").lower()
+        if side not in ("buy", "sell") or not trade.quantity or trade.price is None:
+            self.ignored += 1
+            return
+        position = self._positions.get(trade.ticker)
+        if position is None:
+            position = self._positions[trade.ticker] = _Position()
+        was_open = bool(position.quantity)
+        unrealized, market_value = position.unrealized, position.market_value
+        quantity = abs(int(trade.quantity))
+        if side == "buy":
+            position.bought += quantity
+        else:
+            position.sold += quantity
+            quantity = -quantity
+        self.realized += position.fill(quantity, float(trade.price))
+        if position.mark_source != "feed":
+            position.mark, position.mark_source = float(trade.price), "trade"
+        position.trades += 1
+        self.trades += 1
+        self.unrealized += position.unrealized - unrealized
+        self.market_value += position.market_value - market_value
+        self.open_positions += bool(position.quantity) - was_open
+
+    def _advance(self):
+        folded_ids = self._folded_ids
+        while self.last_id + 1 in folded_ids:
+            self.last_id += 1
+            folded_ids.discard(self.last_id)
+
+    def settle(self, scanned_to: int):
+        """Called after a scan returned every committed trade up to id ``scanned_to``.
+
+        Ids up to ``scanned_to`` still missing are gaps; those missing for
+        ``gap_timeout`` seconds are given up and the watermark moves past them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            gaps = self._gaps
+            self._gaps = {}
+            for trade_id in range(self.last_id + 1, scanned_to + 1):
+                if trade_id not in self._folded_ids:
+                    first_seen = gaps.get(trade_id, now)
+                    if now - first_seen < self.gap_timeout:
+                        self._gaps[trade_id] = first_seen
+            watermark = min(self._gaps) - 1 if self._gaps else max(self.last_id, scanned_to)
+            self._given_up = {i: at for i, at in self._given_up.items() if now - at < self.gap_timeout}
+            if watermark > self.last_id:
+                expired = [i for i in range(self.last_id + 1, watermark + 1) if i not in self._folded_ids]
+                logger.warning("Gave up on %d trade ids up to %d that never committed", len(expired), watermark)
+                self._given_up.update((i, now) for i in expired)
+                self._folded_ids = {i for i in self._folded_ids if i > watermark}
+                self.last_id = watermark
+                self._advance()
+
+    def mark(self, tickers: Iterable[str], prices: Iterable[float]):
+        """Mark the positions among ``tickers`` at the feed ``prices``; other quotes are skipped."""
+        positions = self._positions
+        with self._lock:
+            for ticker, price in zip(tickers, prices):
+                position = positions.get(ticker)
+                if position is None or price != price:
+                    continue
+                unrealized, market_value = position.unrealized, position.market_value
+                position.mark, position.mark_source = float(price), "feed"
+                self.unrealized += position.unrealized - unrealized
+                self.market_value += position.market_value - market_value
+
+    def position(self, ticker: str) -> Optional[dict]:
+        with self._lock:
+            position = self._positions.get(ticker)
+            return self._describe(ticker, position) if position is not None else None
+
+    def positions(self, open_only: bool = True) -> List[dict]:
+        with self._lock:
+            return [self._describe(ticker, p) for ticker, p in sorted(self._positions.items())
+                    if p.quantity or not open_only]
+
+    @staticmethod
+    def _describe(ticker: str, position: _Position) -> dict:
+        unrealized = position.unrealized
+        return {
+            "ticker": ticker,
+            "quantity": position.quantity,
+            "avg_cost": round(position.avg_cost, 6),
+            "mark": position.mark,
+            "mark_source": position.mark_source,
+            "market_value": round(position.market_value, 2),
+            "realized_pl": round(position.realized, 2),
+            "unrealized_pl": round(unrealized, 2),
+            "total_pl": round(position.realized + unrealized, 2),
+            "trades": position.trades,
+            "bought": position.bought,
+            "sold": position.sold
+        }
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "open_positions": self.open_positions,
+                "tickers": len(self._positions),
+                "market_value": round(self.market_value, 2),
+                "realized_pl": round(self.realized, 2),
+                "unrealized_pl": round(self.unrealized, 2),
+                "total_pl": round(self.realized + self.unrealized, 2),
+                "trades": self.trades,
+                "ignored_trades": self.ignored,
+                "last_trade_id": max(self._folded_ids, default=self.last_id),
+                "pending_trade_ids": len(self._gaps)
+            }
+
+    def snapshot(self) -> dict:
+        """State for ``restore``; also recomputes the running totals to shed float drift."""
+        with self._lock:
+            self._recount()
+            return {
+                "version": SNAPSHOT_VERSION,
+                "last_id": self.last_id,
+                "folded_ids": sorted(self._folded_ids),
+                "ignored": self.ignored,
+                "positions": {ticker: p.to_dict() for ticker, p in self._positions.items()}
+            }
+
+    def restore(self, state: dict):
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported position snapshot version: {state.get('version')}")
+        with self._lock:
+            self._positions = {ticker: _Position.from_dict(values)
+                               for ticker, values in state["positions"].items()}
+            self.last_id = state["last_id"]
+            self._folded_ids = set(state["folded_ids"])
+            self._gaps = {}
+            self._given_up = {}
+            self.ignored = state.get("ignored", 0)
+            self._recount()
+
+    def _recount(self):
+        self._reset_totals()
+        for position in self._positions.values():
+            self.realized += position.realized
+            self.unrealized += position.unrealized
+            self.market_value += position.market_value
+            self.open_positions += bool(position.quantity)
+            self.trades += position.trades
+
+    def save(self, path: str):
+        """Write a snapshot atomically (temp file + rename)."""
+        state = self.snapshot()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        logger.debug(f"Saved {len(state['positions'])} positions from trades up to {state['last_id']} "
+                     f"and {len(state['folded_ids'])} after it to {path}")
+
+    def load(self, path: str) -> bool:
+        """Restore the snapshot at ``path``; False if there is none or it is unreadable."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                self.restore(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring position snapshot {path}: {e}")
+            return False
+        logger.info(f"Loaded {len(self)} positions up to trade {self.last_id} from {path}")
+        return True
+
+
+class SnapshotLock:
+    """Exclusive lock next to the snapshot so that one of several processes sharing it writes it.
+
+    ``acquire`` does not wait; the process that gets the lock keeps it until
+    it exits.
+    """
+
+    def __init__(self, path: str):
+        self.path = f"{path}.lock"
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        if self._fd is not None or fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
@@ -0,0 +1,121 @@
+"""Trade analysis over a range of trades_data day partitions.
+
+Each ``trades_data/YYYY/MM/DD/trades.csv`` partition in the range is reduced
+to an :class:`analytics.TradeAggregator` (read the way
+:func:`analytics.aggregate_day` reads it) in a worker process; the parent
+merges them as they complete. The sums are exact, so the result is the same
+as ``analytics.analyze_days`` and /analyze/aws give for those days.
+
+    python range_analysis.py --start 2025-01-01 --end 2025-12-31 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import analytics
+from analytics import TradeAggregator
+
+
+def find_partitions(base_dir: str, start: date, end: date) -> List[Tuple[date, str]]:
+    partitions = []
+    day = start
+    while day <= end:
+        path = os.path.join(base_dir, day.strftime("%Y/%m/%d"), "trades.csv")
+        if os.path.exists(path):
+            partitions.append((day, path))
+        day += timedelta(days=1)
+    return partitions
+
+
+def _aggregate(item: Tuple[str, date]) -> Tuple[date, TradeAggregator]:
+    base_dir, day = item
+    return day, analytics.aggregate_day(analytics.LocalBackend(base_dir), day)
+
+
+def summarize(totals: TradeAggregator, top: Optional[int] = 10) -> dict:
+    """The /analyze/aws response fields for the merged totals, plus VWAP."""
+    tickers = sorted(totals.ticker_rows(vwap=True), key=lambda t: t["total_volume"], reverse=True)
+    result = totals.result("", top or len(tickers))
+    notional = totals.notional()
+    total_volume = result["total_volume"]
+    return {
+        "total_volume": total_volume,
+        "average_price": result["average_price"],
+        "vwap": round(notional / total_volume, 4) if total_volume and notional is not None else 0,
+        "trade_count": result["trade_count"],
+        "top_tickers": tickers[:top] if top else tickers
+    }
+
+
+def iter_range_analysis(base_dir: str, start: date, end: date, workers: Optional[int] = None,
+                        top: Optional[int] = 10) -> Iterator[dict]:
+    """Yield one ``progress`` event per aggregated partition, then the ``result``."""
+    partitions = [(base_dir, day) for day, _ in find_partitions(base_dir, start, end)]
+    started = time.perf_counter()
+    totals = TradeAggregator()
+    daily = {}
+
+    def progress(day: date, partial: TradeAggregator, done: int) -> dict:
+        totals.merge(partial)
+        daily[day] = (sum(v[0] for v in partial.totals.values()), sum(v[1] for v in partial.totals.values()))
+        return {"event": "progress", "date": day.isoformat(), "done": done, "total": len(partitions),
+                "elapsed": round(time.perf_counter() - started, 3)}
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(partitions) or 1))
+    if workers == 1:
+        for done, item in enumerate(partitions, 1):
+            yield progress(*_aggregate(item), done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_aggregate, item) for item in partitions]
+            for done, future in enumerate(as_completed(futures), 1):
+                yield progress(*future.result(), done)
+
+    yield {
+        "event": "result",
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "partitions": len(partitions),
+        **summarize(totals, top),
+        "daily": [{"date": day.isoformat(), "volume": volume, "trade_count": count}
+                  for day, (volume, count) in sorted(daily.items())],
+        "elapsed": round(time.perf_counter() - started, 3)
+    }
+
+
+def analyze_range(base_dir: str, start: date, end: date, workers: Optional[int] = None,
+                  top: Optional[int] = 10) -> dict:
+    for event in iter_range_analysis(base_dir, start, end, workers, top):
+        pass
+    return event
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze trades over a range of day partitions")
+    parser.add_argument("--dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "trades_data"))
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--quiet", action="store_true", help="do not print progress")
+    args = parser.parse_args()
+
+    for event in iter_range_analysis(args.dir, date.fromisoformat(args.start), date.fromisoformat(args.end),
+                                     args.workers, args.top):
+        if event["event"] == "progress":
+            if not args.quiet:
+                print(f"\r{event['done']}/{event['total']} partitions ({event['date']}) "
+                      f"{event['elapsed']:.1f}s", end="", file=sys.stderr, flush=True)
+            continue
+        if not args.quiet and event["partitions"]:
+            print(file=sys.stderr)
+        print(json.dumps(event, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Replay of recorded prices through the real-time alert path.
+
+A tape is loaded from ``historical_prices.csv`` (``date,ticker,close_price``)
+or a recorded tick file (``timestamp,ticker,price`` and optionally
+``volume``) and sorted by time. ``Replayer`` feeds it, one timestamp at a
+time, through the alert rules of the live producer (an
+``alert_rules.RuleEngine``) into an ``AlertHub``, ``speed`` times faster
+than recorded or as fast as possible with ``speed=0``.
+
+    python benchmarks/bench_alert_replay.py --copies 250 --speed 0
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from alert_hub import AlertHub
+from alert_rules import DEFAULT_RULES, RuleEngine
+from columnar_store import parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+TIME_COLUMNS = ("timestamp", "date")
+PRICE_COLUMNS = ("price", "close_price")
+VOLUME_COLUMNS = ("volume", "quantity")
+
+
+class TickTape:
+    """Recorded quotes sorted by time; the quotes of tick ``k`` are rows ``starts[k]:starts[k + 1]``."""
+
+    def __init__(self, times: np.ndarray, tickers: np.ndarray, prices: np.ndarray,
+                 volumes: Optional[np.ndarray] = None):
+        order = np.argsort(times, kind="stable")
+        self.times = times[order].astype("datetime64[us]")
+        self.tickers = tickers[order]
+        self.prices = prices[order]
+        self.volumes = volumes[order] if volumes is not None else None
+        change = np.flatnonzero(self.times[1:] != self.times[:-1]) + 1
+        self.starts = np.concatenate(([0], change, [len(self.times)])).astype(np.int64) if len(self.times) \
+            else np.zeros(1, dtype=np.int64)
+        self.ticker_count = len(set(self.tickers.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def widen(self, copies: int) -> "TickTape":
+        """``copies`` variants of every ticker (``AAPL.1``, ...), each shifted in time within its own series.
+
+        Gives a many-ticker load with the price dynamics of the recording.
+        """
+        if copies <= 1:
+            return self
+        times, tickers, prices = [self.times], [self.tickers], [self.prices]
+        volumes = [self.volumes] if self.volumes is not None else None
+        for ticker in np.unique(self.tickers):
+            rows = np.flatnonzero(self.tickers == ticker)
+            for copy in range(1, copies):
+                times.append(self.times[rows])
+                tickers.append(np.full(len(rows), f"{ticker}.{copy}", dtype=object))
+                prices.append(np.roll(self.prices[rows], copy * 7))
+                if volumes is not None:
+                    volumes.append(np.roll(self.volumes[rows], copy * 7))
+        return TickTape(np.concatenate(times), np.concatenate(tickers), np.concatenate(prices),
+                        np.concatenate(volumes) if volumes is not None else None)
+
+
+def load_tape(path: str) -> TickTape:
+    df = pd.read_csv(path)
+    time_column = next((c for c in TIME_COLUMNS if c in df.columns), None)
+    price_column = next((c for c in PRICE_COLUMNS if c in df.columns), None)
+    if time_column is None or price_column is None or "ticker" not in df.columns:
+        raise ValueError(f"{path}: expected a ticker column, one of {TIME_COLUMNS} and one of {PRICE_COLUMNS}")
+    volume_column = next((c for c in VOLUME_COLUMNS if c in df.columns), None)
+    df = df.dropna(subset=[price_column])
+    return TickTape(parse_timestamps(df[time_column]).to_numpy(), df["ticker"].to_numpy(dtype=object),
+                    df[price_column].to_numpy(dtype=np.float64),
+                    df[volume_column].to_numpy(dtype=np.float64) if volume_column else None)
+
+
+class Replayer:
+    """Plays a ``TickTape`` into an ``AlertHub``.
+
+    Tick ``k`` is due ``(times[k] - times[0]) / speed`` seconds after the
+    start; with ``speed=0`` ticks follow each other as fast as the event
+    loop allows, yielding once per tick so senders keep up. Ticks are
+    evaluated by ``rules`` (the default rules if omitted), whose price state
+    is reset at the start of every pass. Alerts carry the recorded timestamp
+    and go to ``on_alerts`` (e.g. the alert writer) before they are
+    published; ``on_quotes(tickers, prices)`` sees every tick's quotes. A
+    tick that raises is logged, counted in ``errors`` and skipped.
+    """
+
+    def __init__(self, tape: TickTape, speed: float = 0.0, loop: bool = False,
+                 rules: Optional[RuleEngine] = None):
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+        self.tape = tape
+        self.rules = rules if rules is not None else RuleEngine(DEFAULT_RULES)
+        self.speed = speed
+        self.loop = loop
+        self.ticks = 0
+        self.quotes = 0
+        self.alerts = 0
+        self.errors = 0
+        self.lag = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    async def run(self, hub: AlertHub, on_alerts: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+                  on_quotes: Optional[Callable[[np.ndarray, np.ndarray], None]] = None):
+        tape = self.tape
+        offsets = (tape.times[tape.starts[:-1]] - tape.times[0]) / np.timedelta64(1, "s") if len(tape) else []
+        names, inverse = np.unique(tape.tickers.astype(str), return_inverse=True)
+        codes = self.rules.ticker_codes(names.tolist())[inverse]
+        self.started = time.perf_counter()
+        self.finished = None
+        base = self.started
+        try:
+            while True:
+                self.rules.reset()
+                for k, offset in enumerate(offsets):
+                    if self.speed:
+                        delay = base + offset / self.speed - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        else:
+                            self.lag = max(self.lag, -delay)
+                            await asyncio.sleep(0)
+                    else:
+                        await asyncio.sleep(0)
+                    created = time.perf_counter()
+                    start, end = tape.starts[k], tape.starts[k + 1]
+                    self.ticks += 1
+                    self.quotes += end - start
+                    # One failing tick is logged and skipped, as in AlertHub._produce
+                    try:
+                        timestamp = tape.times[start].item()
+                        volumes = tape.volumes[start:end] if tape.volumes is not None else None
+                        alerts = self.rules.evaluate(codes[start:end], tape.prices[start:end], volumes, timestamp)
+                        if on_quotes is not None:
+                            on_quotes(tape.tickers[start:end], tape.prices[start:end])
+                        if alerts:
+                            self.alerts += len(alerts)
+                            if on_alerts is not None:
+                                await on_alerts(alerts)
+                            hub.publish(alerts, created)
+                    except Exception as e:
+                        self.errors += 1
+                        logger.error(f"Replay tick {k} failed: {e}")
+                if not self.loop or not len(tape):
+                    break
+                base = time.perf_counter()
+        finally:
+            self.finished = time.perf_counter()
+            logger.info(f"Replay finished: {self.ticks} ticks, {self.alerts} alerts in {self.elapsed:.2f}s")
+
+    def stats(self) -> dict:
+        elapsed = self.elapsed
+        return {
+            "running": self.started is not None and self.finished is None,
+            "speed": self.speed or "max",
+            "tickers": self.tape.ticker_count,
+            "ticks": self.ticks,
+            "quotes": int(self.quotes),
+            "alerts": self.alerts,
+            "errors": self.errors,
+            "elapsed": round(elapsed, 3),
+            "quotes_per_second": round(self.quotes / elapsed, 1) if elapsed else 0.0,
+            "alerts_per_second": round(self.alerts / elapsed, 1) if elapsed else 0.0,
+            "max_lag": round(self.lag, 3)
+        }
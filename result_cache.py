@@ -0,0 +1,207 @@
+"""Result cache for the /analyze endpoints.
+
+Entries are keyed by endpoint and date. A day's entries are invalidated
+when trades for that day are committed, so closed days are served from the
+cache until they are evicted while the current day stays fresh.
+``MemoryResultCache`` is a per-process LRU with a TTL; ``RedisResultCache``
+shares entries between workers through Redis.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryResultCache:
+    """Thread-safe LRU of at most ``max_entries`` values, each valid for ``ttl`` seconds.
+
+    Read ``token(key)`` before computing a value and pass it to ``put``: if
+    the key was invalidated in between, the (possibly stale) value is
+    dropped instead of stored.
+    """
+
+    backend = "memory"
+    # Lookups are in-process: ``cached`` calls them directly on the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def token(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def put(self, key: str, value, token: int):
+        with self._lock:
+            if self._generations.get(key, 0) != token:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+class RedisResultCache:
+    """Same interface as :class:`MemoryResultCache`, stored in Redis as JSON with a TTL.
+
+    Redis errors are logged and treated as misses so the endpoints keep
+    working (uncached) while Redis is down. Redis evicts by its own policy,
+    so ``max_entries`` is not enforced here.
+
+    Every call is a network round trip, so ``cached`` runs them on
+    ``executor``, and ``invalidate`` only queues its pipeline there and
+    returns. One thread keeps them in order: a lookup queued after an
+    invalidation sees it.
+    """
+
+    backend = "redis"
+    blocking = True
+
+    def __init__(self, url: str, ttl: float = 3600.0, prefix: str = "analysis:", timeout: float = 0.1):
+        import redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache")
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def get(self, key: str):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Result cache get failed: {e}")
+            self._count("errors")
+            raw = None
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(raw)
+
+    def token(self, key: str) -> int:
+        try:
+            return int(self._client.get(f"{self.prefix}gen:{key}") or 0)
+        except Exception:
+            self._count("errors")
+            return -1
+
+    def put(self, key: str, value, token: int):
+        if token < 0 or self.token(key) != token:
+            return
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl))
+        except Exception as e:
+            logger.warning(f"Result cache put failed: {e}")
+            self._count("errors")
+
+    def invalidate(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            self.executor.submit(self._invalidate, keys)
+
+    def _invalidate(self, keys: list):
+        try:
+            pipe = self._client.pipeline()
+            for key in keys:
+                pipe.incr(f"{self.prefix}gen:{key}")
+            pipe.delete(*(self.prefix + key for key in keys))
+            removed = pipe.execute()[-1]
+            self._count("invalidations", removed)
+        except Exception as e:
+            logger.warning(f"Result cache invalidation failed: {e}")
+            self._count("errors")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "errors": self.errors,
+                "invalidations": self.invalidations
+            }
+
+
+async def cached(cache, key: str, compute, store: bool = True):
+    """Return the cached value for ``key`` or await ``compute()``, store and return it.
+
+    When ``compute()`` raises nothing is stored, so a failed read is retried
+    on the next request rather than served from the cache. ``store=False``
+    bypasses the cache.
+    """
+    if not store:
+        return await compute()
+    if cache.blocking:
+        loop = asyncio.get_running_loop()
+
+        def call(method, *args):
+            return loop.run_in_executor(cache.executor, method, *args)
+    else:
+        async def call(method, *args):
+            return method(*args)
+    value = await call(cache.get, key)
+    if value is None:
+        token = await call(cache.token, key)
+        value = await compute()
+        await call(cache.put, key, value, token)
+    return value
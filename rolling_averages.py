@@ -0,0 +1,148 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from trade_buffer import TradeBuffer, TradeColumns, from_epoch, to_epoch
+
+DEFAULT_WINDOWS = "1m,5m,1h"
+# Below this many trades window sums are updated one by one rather than with bincount
+SMALL_BATCH = 16
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_windows(spec: str) -> Dict[str, int]:
+    """Parse ``"1m,5m,1h"`` into ``{"1m": 60, "5m": 300, "1h": 3600}``."""
+    windows = {}
+    for name in (w.strip() for w in spec.split(",")):
+        if not name:
+            continue
+        if name[-1] not in _UNITS or not name[:-1].isdigit():
+            raise ValueError(f"Invalid window: {name}")
+        windows[name] = int(name[:-1]) * _UNITS[name[-1]]
+    return windows
+
+
+class RollingAverages:
+    """Per-ticker sliding-window average prices, updated in O(1) per trade.
+
+    Windows end at the latest trade timestamp seen for any ticker, which is
+    how the calculate_averages Celery task defined its 5-minute window.
+    Trades are held once, in a ``TradeBuffer``; each window keeps a cursor
+    into it (the first trade still inside the window) and per-ticker price
+    sums and counts indexed by interned ticker id.
+    """
+
+    def __init__(self, windows: Dict[str, int], buffer: Optional[TradeBuffer] = None):
+        self.windows = windows
+        self.buffer = buffer if buffer is not None else TradeBuffer(keep_day=False)
+        self.buffer.retain_seconds = max(self.buffer.retain_seconds, max(windows.values()))
+        self._cursors = {name: self.buffer.end for name in windows}
+        self._sums = {name: np.zeros(0) for name in windows}
+        self._counts = {name: np.zeros(0, dtype=np.int64) for name in windows}
+        self._size = 0
+        self._lock = self.buffer.lock
+        self._dirty = set()
+
+    def add(self, ticker: str, price: float, timestamp: datetime):
+        with self._lock:
+            ticker_id = self.buffer.intern(ticker)
+            self._add_columns(TradeColumns(np.array([ticker_id], dtype=np.int32), np.array([price], dtype=np.float64),
+                                           np.zeros(1, dtype=np.int32), np.array([to_epoch(timestamp)])))
+
+    def add_many(self, trades: Iterable) -> TradeColumns:
+        """Add trades (anything with ticker, price, quantity and timestamp) and return them as columns."""
+        with self._lock:
+            columns = self.buffer.columns_of(trades)
+            self._add_columns(columns)
+        return columns
+
+    def _add_columns(self, columns: TradeColumns):
+        if not len(columns):
+            return
+        indexes, late = self.buffer.extend(columns)
+        if len(self.buffer.tickers) > self._size:
+            self._grow(max(len(self.buffer.tickers), 2 * self._size))
+        kept = indexes >= 0
+        outside = {name: [] for name in self.windows}
+        for k in late:
+            # A late trade inserted among trades that already left a window is outside it
+            for name in self.windows:
+                if indexes[k] < self._cursors[name]:
+                    self._cursors[name] += 1
+                    outside[name].append(k)
+        ids, prices = columns.ids, columns.prices
+        all_kept = bool(kept.all())
+        for name in self.windows:
+            if all_kept and not outside[name]:
+                self._update(name, ids, prices, 1)
+                continue
+            counted = kept.copy()
+            counted[outside[name]] = False
+            self._update(name, ids[counted], prices[counted], 1)
+        self._dirty.update(self.buffer.tickers[i] for i in set((ids if all_kept else ids[kept]).tolist()))
+        self._evict()
+        self.buffer.trim()
+
+    def _update(self, name: str, ids: np.ndarray, prices: np.ndarray, sign: int):
+        sums, counts = self._sums[name], self._counts[name]
+        if len(ids) <= SMALL_BATCH:
+            # Element-wise is cheaper than bincounts over every ticker for the odd trade
+            for ticker_id, price in zip(ids.tolist(), prices.tolist()):
+                sums[ticker_id] += sign * price
+                counts[ticker_id] += sign
+                if not counts[ticker_id]:
+                    sums[ticker_id] = 0.0
+            return
+        counts += sign * np.bincount(ids, minlength=self._size)
+        sums += sign * np.bincount(ids, weights=prices, minlength=self._size)
+        if sign < 0:
+            sums[counts == 0] = 0.0
+
+    def _grow(self, size: int):
+        for name in self.windows:
+            self._sums[name] = np.concatenate((self._sums[name], np.zeros(size - self._size)))
+            self._counts[name] = np.concatenate((self._counts[name], np.zeros(size - self._size, dtype=np.int64)))
+        self._size = size
+
+    def _evict(self):
+        buffer = self.buffer
+        end = buffer.end - buffer.base
+        for name, seconds in self.windows.items():
+            cursor = self._cursors[name] - buffer.base
+            start = buffer.latest - seconds
+            if cursor >= end or buffer.times[cursor] >= start:
+                continue
+            stop = cursor + int(np.searchsorted(buffer.times[cursor:end], start))
+            self._update(name, buffer.ids[cursor:stop], buffer.prices[cursor:stop], -1)
+            self._cursors[name] = stop + buffer.base
+
+    def snapshot(self, window: str = "5m", tickers: Optional[Iterable[str]] = None) -> List[dict]:
+        if window not in self.windows:
+            raise ValueError(f"Unknown window: {window}")
+        with self._lock:
+            latest = self.buffer.latest
+            if latest is None:
+                return []
+            period_start = from_epoch(latest - self.windows[window]).isoformat()
+            period_end = from_epoch(latest).isoformat()
+            sums, counts = self._sums[window], self._counts[window]
+            result = []
+            for ticker in sorted(tickers if tickers is not None else self.buffer.tickers):
+                ticker_id = self.buffer.ticker_ids.get(ticker)
+                if ticker_id is None or ticker_id >= self._size or not counts[ticker_id]:
+                    continue
+                result.append({
+                    "ticker": ticker,
+                    "avg_price": float(sums[ticker_id] / counts[ticker_id]),
+                    "period_start": period_start,
+                    "period_end": period_end,
+                    "trade_count": int(counts[ticker_id])
+                })
+            return result
+
+    def take_dirty(self) -> List[str]:
+        """Return and clear the tickers that received trades since the last call."""
+        with self._lock:
+            dirty, self._dirty = sorted(self._dirty), set()
+        return dirty
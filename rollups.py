@@ -0,0 +1,187 @@
+"""Per-ticker OHLCV rollups at minute and day granularity.
+
+Trades are folded into ``trade_rollups_minute`` and ``trade_rollups_day`` in
+the same transaction that inserts them, so /analyze reads one row per ticker
+and day instead of aggregating the raw ``trades`` table.
+"""
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, select, text
+
+from database import TradeDB, TradeRollupDay, TradeRollupMinute
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = {"1m": TradeRollupMinute, "1d": TradeRollupDay}
+# PostgreSQL advisory lock key serializing startup rebuilds across workers
+REBUILD_LOCK_KEY = 0x726F6C6C  # "roll"
+
+
+def minute_bucket(timestamp: datetime) -> datetime:
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def day_bucket(timestamp: datetime) -> date:
+    return timestamp.date()
+
+
+def fold(trades: Iterable, bucket: Callable, into: Optional[Dict[Tuple, dict]] = None) -> Dict[Tuple, dict]:
+    """Aggregate trades into rollup rows keyed by (ticker, bucket)."""
+    rows = {} if into is None else into
+    for trade in trades:
+        ts, price = trade.timestamp, trade.price
+        if ts is None:
+            continue
+        key = (trade.ticker, bucket(ts))
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                "ticker": key[0], "bucket": key[1],
+                "open": price, "high": price, "low": price, "close": price,
+                "open_time": ts, "close_time": ts,
+                "volume": trade.quantity, "trade_count": 1, "price_sum": price
+            }
+            continue
+        if price > row["high"]:
+            row["high"] = price
+        if price < row["low"]:
+            row["low"] = price
+        if ts < row["open_time"]:
+            row["open"], row["open_time"] = price, ts
+        if ts >= row["close_time"]:
+            row["close"], row["close_time"] = price, ts
+        row["volume"] += trade.quantity
+        row["trade_count"] += 1
+        row["price_sum"] += price
+    return rows
+
+
+def _upsert(db, model, rows: List[dict]):
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        greatest, least = func.greatest, func.least
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+        greatest, least = func.max, func.min
+    stmt = insert(model.__table__)
+    new, cur = stmt.excluded, model.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[cur.ticker, cur.bucket],
+        set_={
+            "open": case((new.open_time < cur.open_time, new.open), else_=cur.open),
+            "open_time": least(cur.open_time, new.open_time),
+            "close": case((new.close_time >= cur.close_time, new.close), else_=cur.close),
+            "close_time": greatest(cur.close_time, new.close_time),
+            "high": greatest(cur.high, new.high),
+            "low": least(cur.low, new.low),
+            "volume": cur.volume + new.volume,
+            "trade_count": cur.trade_count + new.trade_count,
+            "price_sum": cur.price_sum + new.price_sum
+        }
+    )
+    # Sorted keys give concurrent writers the same lock order
+    db.execute(stmt, sorted(rows, key=lambda r: (r["ticker"], r["bucket"])))
+
+
+def apply_rollups(db, trades: List):
+    """Fold ``trades`` into both rollup tables; the caller commits."""
+    _upsert(db, TradeRollupMinute, list(fold(trades, minute_bucket).values()))
+    _upsert(db, TradeRollupDay, list(fold(trades, day_bucket).values()))
+
+
+def rebuild_rollups(db, chunk_size: int = 10000) -> int:
+    """Recompute both rollup tables from ``trades`` with one ordered streaming scan.
+
+    Minute rows are written whenever the scan moves past a day, so memory
+    holds at most one day of minute buckets.
+    """
+    db.query(TradeRollupMinute).delete()
+    db.query(TradeRollupDay).delete()
+    result = db.execute(
+        select(TradeDB.ticker, TradeDB.price, TradeDB.quantity, TradeDB.timestamp)
+        .where(TradeDB.timestamp.isnot(None))
+        .order_by(TradeDB.timestamp)
+        .execution_options(stream_results=True)
+    )
+    minutes, days, current_day, count = {}, {}, None, 0
+    for rows in iter(lambda: result.fetchmany(chunk_size), []):
+        for trade in rows:
+            day = trade.timestamp.date()
+            if day != current_day:
+                _upsert(db, TradeRollupMinute, list(minutes.values()))
+                minutes, current_day = {}, day
+            fold((trade,), minute_bucket, minutes)
+            fold((trade,), day_bucket, days)
+            count += 1
+    _upsert(db, TradeRollupMinute, list(minutes.values()))
+    _upsert(db, TradeRollupDay, list(days.values()))
+    db.commit()
+    logger.info(f"Rebuilt rollups from {count} trades")
+    return count
+
+
+def rebuild_if_missing(db) -> Optional[int]:
+    """Rebuild the rollups if ``rollups_missing``; returns the trades folded, or None.
+
+    Workers starting together would each see empty rollups, and the
+    additive upserts of concurrent rebuilds double-count. On PostgreSQL
+    the check and the rebuild run in one transaction under an advisory
+    lock, so a worker that waited finds the rollups built and skips.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": REBUILD_LOCK_KEY})
+    if not rollups_missing(db):
+        db.rollback()  # ends the transaction and its lock
+        return None
+    return rebuild_rollups(db)
+
+
+def rollups_missing(db) -> bool:
+    """True when trades exist but the day rollup is empty (first start after upgrade)."""
+    has_rollups = db.query(TradeRollupDay.ticker).first() is not None
+    return not has_rollups and db.query(TradeDB.id).first() is not None
+
+
+def ticker_summary(db, start_day: date, end_day: date) -> list:
+    """Per-ticker volume, trade count and mean price over ``start_day``..``end_day``."""
+    return db.query(
+        TradeRollupDay.ticker,
+        func.sum(TradeRollupDay.volume).label("total_volume"),
+        (func.sum(TradeRollupDay.price_sum) / func.sum(TradeRollupDay.trade_count)).label("avg_price"),
+        func.sum(TradeRollupDay.trade_count).label("trade_count")
+    ).filter(
+        TradeRollupDay.bucket >= start_day,
+        TradeRollupDay.bucket <= end_day
+    ).group_by(TradeRollupDay.ticker).all()
+
+
+def daily_totals(db, start_day: date, end_day: date) -> list:
+    return db.query(
+        TradeRollupDay.bucket,
+        func.sum(TradeRollupDay.volume).label("total_volume"),
+        func.sum(TradeRollupDay.trade_count).label("trade_count")
+    ).filter(
+        TradeRollupDay.bucket >= start_day,
+        TradeRollupDay.bucket <= end_day
+    ).group_by(TradeRollupDay.bucket).order_by(TradeRollupDay.bucket).all()
+
+
+def bars(db, ticker: str, interval: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list:
+    model = INTERVALS[interval]
+    query = db.query(model).filter(model.ticker == ticker)
+    if start is not None:
+        query = query.filter(model.bucket >= (start if interval == "1m" else start.date()))
+    if end is not None:
+        query = query.filter(model.bucket <= (end if interval == "1m" else end.date()))
+    return [
+        {
+            "ticker": r.ticker, "bucket": r.bucket.isoformat(),
+            "open": r.open, "high": r.high, "low": r.low, "close": r.close,
+            "volume": r.volume, "trade_count": r.trade_count
+        }
+        for r in query.order_by(model.bucket).all()
+    ]
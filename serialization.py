@@ -0,0 +1,105 @@
+"""JSON encoding for trade and alert responses.
+
+Responses are built from explicit encoders (a row or ORM trade becomes a
+tuple of JSON-ready values, zipped with its field names) and serialized in
+one call, instead of FastAPI's generic ``jsonable_encoder`` walking every
+value. orjson is used when it is installed (``pip install orjson``);
+otherwise the standard library encoder, with compact separators, produces
+the same JSON.
+"""
+import json
+from datetime import date, datetime
+from typing import Callable, Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+TRADE_FIELDS = ["id", "ticker", "price", "quantity", "trade_type", "timestamp"]
+DATETIME_FIELDS = frozenset({"timestamp"})
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # NumPy scalar
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+
+if orjson is not None:
+    ENGINE = "orjson"
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+else:
+    ENGINE = "json"
+
+    def dumps(value) -> bytes:
+        return _encoder.encode(value).encode()
+
+
+def dumps_text(value) -> str:
+    """``dumps`` as text, for WebSocket text frames."""
+    return dumps(value).decode() if orjson is not None else _encoder.encode(value)
+
+
+class FastJSONResponse(Response):
+    """JSON response serialized with ``dumps``; return it directly so FastAPI skips ``jsonable_encoder``."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def row_encoder(fields: Sequence[str]) -> Callable[[Sequence], tuple]:
+    """Encoder of a row whose first values are ``fields`` into a tuple of JSON-ready values."""
+    width = len(fields)
+    stamps = [i for i, field in enumerate(fields) if field in DATETIME_FIELDS]
+    if not stamps:
+        return lambda row: tuple(row[:width])
+
+    def encode(row) -> tuple:
+        values = list(row[:width])
+        for i in stamps:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        return tuple(values)
+
+    return encode
+
+
+def rows_to_dicts(rows: Iterable[Sequence], fields: Sequence[str]) -> List[dict]:
+    encode = row_encoder(fields)
+    return [dict(zip(fields, encode(row))) for row in rows]
+
+
+def encode_rows(rows: Iterable[Sequence], fields: Sequence[str]) -> bytes:
+    """Rows as a JSON array of objects."""
+    return dumps(rows_to_dicts(rows, fields))
+
+
+def encode_ndjson(rows: Iterable[Sequence], fields: Sequence[str]) -> bytes:
+    """Rows as newline-delimited JSON objects."""
+    return b"".join(dumps(row) + b"\n" for row in rows_to_dicts(rows, fields))
+
+
+_trade_row = row_encoder(TRADE_FIELDS)
+
+
+def trade_dict(trade) -> dict:
+    """A trade (ORM object or anything with the trade attributes) as a JSON-ready dict."""
+    return dict(zip(TRADE_FIELDS, _trade_row([getattr(trade, field) for field in TRADE_FIELDS])))
+
+
+def encode_alert_batch(alerts: List[dict]) -> str:
+    """The ``/ws`` message for a batch of alerts."""
+    return dumps_text({"type": "batch", "alerts": alerts})
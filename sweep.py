@@ -0,0 +1,147 @@
+"""Parameter sweep for the SMA crossover strategy.
+
+The price arrays are copied once into shared memory; worker processes map
+them without pickling any DataFrame and run backtest.backtest for their
+share of the (fast, slow, cooldown) grid.
+
+    python sweep.py --fast 10:100:10 --slow 100:300:50 --cooldown 0,5,10 --top 20
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import PriceHistory, backtest
+
+_ARRAYS = ("starts", "dates", "closes")
+_worker_history: Optional[PriceHistory] = None
+_worker_sma_cache: Dict[int, np.ndarray] = {}
+_worker_shm: List[shared_memory.SharedMemory] = []
+
+
+class SharedPriceHistory:
+    """Owns shared-memory copies of a PriceHistory's arrays."""
+
+    def __init__(self, history: PriceHistory):
+        self.blocks = {}
+        self.descriptor = {"tickers": [str(t) for t in history.tickers], "arrays": {}}
+        for name in _ARRAYS:
+            array = np.ascontiguousarray(getattr(history, name))
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            self.blocks[name] = shm
+            self.descriptor["arrays"][name] = (shm.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks = {}
+
+
+def attach(descriptor: dict) -> Tuple[PriceHistory, List[shared_memory.SharedMemory]]:
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in descriptor["arrays"].items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    history = PriceHistory(np.array(descriptor["tickers"]), arrays["starts"], arrays["dates"], arrays["closes"])
+    return history, blocks
+
+
+def _init_worker(descriptor: dict):
+    global _worker_history, _worker_shm
+    _worker_history, _worker_shm = attach(descriptor)
+    _worker_sma_cache.clear()
+
+
+def _run_combos(combos: List[Tuple[int, int, int]]) -> List[dict]:
+    results = []
+    for fast, slow, cooldown in combos:
+        result = backtest(_worker_history, fast, slow, cooldown, sma_cache=_worker_sma_cache)
+        signals = result["signals"]
+        results.append({
+            "fast_window": fast,
+            "slow_window": slow,
+            "cooldown_days": cooldown,
+            "profit_loss": result["profit_loss"],
+            "signal_count": len(signals),
+            "buy_count": sum(1 for s in signals if s["action"] == "buy"),
+            "ticker_profit_loss": result["ticker_profit_loss"],
+        })
+    return results
+
+
+def parameter_grid(fast_windows: Iterable[int], slow_windows: Iterable[int],
+                   cooldowns: Iterable[int]) -> List[Tuple[int, int, int]]:
+    return [(f, s, c) for f, s, c in itertools.product(fast_windows, slow_windows, cooldowns) if f < s]
+
+
+def run_sweep(history: PriceHistory, combos: List[Tuple[int, int, int]], workers: Optional[int] = None,
+              top: Optional[int] = None) -> List[dict]:
+    """Backtest every combo and return the results ranked by total P/L."""
+    if not combos:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(combos)))
+    # Group combos by fast window so each worker reuses its cached SMAs
+    combos = sorted(combos)
+    chunk = max(1, len(combos) // (workers * 4))
+    batches = [combos[i:i + chunk] for i in range(0, len(combos), chunk)]
+    shared = SharedPriceHistory(history)
+    try:
+        # Spawned workers do not inherit the server's threads, locks or sockets as forked ones would
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.descriptor,),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = [r for batch in pool.map(_run_combos, batches) for r in batch]
+    finally:
+        shared.close()
+    results.sort(key=lambda r: r["profit_loss"], reverse=True)
+    for rank, result in enumerate(results, 1):
+        result["rank"] = rank
+    return results[:top] if top else results
+
+
+def _int_list(spec: str) -> List[int]:
+    """Parse ``"10,20,30"`` or ``"start:stop:step"`` (stop inclusive)."""
+    if ":" in spec:
+        start, stop, step = (int(p) for p in spec.split(":"))
+        return list(range(start, stop + 1, step))
+    return [int(p) for p in spec.split(",") if p]
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="SMA crossover parameter sweep")
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "historical_prices.csv"))
+    parser.add_argument("--tickers", help="comma separated, default every ticker")
+    parser.add_argument("--fast", default="10:100:10")
+    parser.add_argument("--slow", default="100:300:50")
+    parser.add_argument("--cooldown", default="0,5,10")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    history = PriceHistory.from_frame(pd.read_csv(args.csv))
+    if args.tickers:
+        history = history.select(args.tickers.split(","))
+    combos = parameter_grid(_int_list(args.fast), _int_list(args.slow), _int_list(args.cooldown))
+
+    start = time.perf_counter()
+    results = run_sweep(history, combos, args.workers, args.top)
+    elapsed = time.perf_counter() - start
+    print(f"{len(combos)} combinations x {len(history.tickers)} tickers in {elapsed:.2f}s")
+    print(f"{'rank':>4} {'fast':>5} {'slow':>5} {'cool':>5} {'signals':>8} {'profit_loss':>14}")
+    for r in results:
+        print(f"{r['rank']:>4} {r['fast_window']:>5} {r['slow_window']:>5} {r['cooldown_days']:>5} "
+              f"{r['signal_count']:>8} {r['profit_loss']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Compact in-memory columns of the recent trades.
+
+``TradeBuffer`` keeps the trades of the last ``retain_seconds`` (and, with
+``keep_day``, of the whole current day) as typed NumPy columns sorted by
+time: an interned ticker id (int32), price (float64), quantity (int32) and
+epoch seconds (float64), 24 bytes per trade with no per-trade Python
+objects. Entries live in ``[lo, hi)`` of the column arrays; when the end is
+reached the live entries are moved to the front or the arrays doubled, so
+an append is amortized O(1). Positions handed out are logical indexes
+(``base`` + array index), which stay valid across those moves.
+
+``TradeColumns`` is one batch of trades in the same layout, converted once
+from ORM rows so every consumer of the trade stream reads arrays.
+"""
+import math
+import threading
+from collections import namedtuple
+from datetime import date, datetime, time, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1024
+# Trades kept for the current day beyond the retention window (24 bytes each)
+DEFAULT_MAX_TRADES = 2_000_000
+
+TickerTotals = namedtuple("TickerTotals", "ticker total_volume avg_price trade_count")
+
+
+def to_epoch(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def from_epoch(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def day_start(seconds: float) -> float:
+    return math.floor(seconds / 86400) * 86400.0
+
+
+class TradeColumns:
+    """One batch of trades as parallel arrays, tickers interned in a ``TradeBuffer``."""
+
+    __slots__ = ("ids", "prices", "quantities", "times")
+
+    def __init__(self, ids: np.ndarray, prices: np.ndarray, quantities: np.ndarray, times: np.ndarray):
+        self.ids = ids
+        self.prices = prices
+        self.quantities = quantities
+        self.times = times
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def datetimes(self) -> np.ndarray:
+        return np.round(self.times * 1e6).astype(np.int64).astype("datetime64[us]")
+
+
+class TradeBuffer:
+    """Time-sorted trade columns covering at least the last ``retain_seconds``.
+
+    Trades older than the retained range are dropped on append (``trim``
+    moves the range forward); a late trade inside it is inserted at its place in time. ``complete_since`` is
+    the epoch time from which every appended trade is still held, so
+    ``day_totals`` can tell whether a day is complete in memory.
+
+    The buffer does not lock around appends; its writer (``RollingAverages``)
+    holds ``lock`` while it interns, appends and calls ``trim`` (once it has
+    read the trades leaving its windows), and ``day_totals`` takes it too.
+    """
+
+    def __init__(self, retain_seconds: float = 0.0, keep_day: bool = True,
+                 max_trades: int = DEFAULT_MAX_TRADES, capacity: int = DEFAULT_CAPACITY):
+        self.retain_seconds = retain_seconds
+        self.keep_day = keep_day
+        self.max_trades = max_trades
+        self.ticker_ids: Dict[str, int] = {}
+        self.tickers: List[str] = []
+        self.ids = np.empty(capacity, dtype=np.int32)
+        self.prices = np.empty(capacity, dtype=np.float64)
+        self.quantities = np.empty(capacity, dtype=np.int32)
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.lo = 0
+        self.hi = 0
+        self.base = 0
+        self.latest: Optional[float] = None
+        self.complete_since = -math.inf
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    @property
+    def start(self) -> int:
+        return self.base + self.lo
+
+    @property
+    def end(self) -> int:
+        return self.base + self.hi
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.prices.nbytes + self.quantities.nbytes + self.times.nbytes
+
+    def intern(self, ticker: str) -> int:
+        ticker_id = self.ticker_ids.get(ticker)
+        if ticker_id is None:
+            ticker_id = self.ticker_ids[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+        return ticker_id
+
+    def columns_of(self, trades: Iterable) -> TradeColumns:
+        """Convert trades (anything with ticker, price, quantity and timestamp) to columns,
+        skipping those without a price or timestamp."""
+        rows = [(self.intern(t.ticker), t.price, t.quantity or 0, to_epoch(t.timestamp))
+                for t in trades if t.price is not None and t.timestamp is not None]
+        if not rows:
+            return TradeColumns(np.empty(0, np.int32), np.empty(0), np.empty(0, np.int32), np.empty(0))
+        ids, prices, quantities, times = zip(*rows)
+        return TradeColumns(np.array(ids, dtype=np.int32), np.array(prices, dtype=np.float64),
+                            np.array(quantities, dtype=np.int32), np.array(times, dtype=np.float64))
+
+    def append(self, ticker_id: int, price: float, quantity: int, ts: float) -> int:
+        """Add one trade and return its logical index, or -1 if it is older than the retained range."""
+        if ts < self.complete_since:
+            self.dropped += 1
+            return -1
+        self._make_room(1)
+        hi = self.hi
+        if self.latest is None or ts >= self.latest:
+            i = hi
+            self.latest = ts
+        else:
+            i = self.lo + int(np.searchsorted(self.times[self.lo:hi], ts, side="right"))
+            for column in (self.ids, self.prices, self.quantities, self.times):
+                column[i + 1:hi + 1] = column[i:hi]
+        self.ids[i] = ticker_id
+        self.prices[i] = price
+        self.quantities[i] = quantity
+        self.times[i] = ts
+        self.hi = hi + 1
+        return self.base + i
+
+    def extend(self, columns: TradeColumns) -> Tuple[np.ndarray, List[int]]:
+        """Add a batch; returns the logical index of every trade (-1 if dropped) and the positions
+        in the batch of the late trades, inserted before the end, in insertion order.
+
+        A batch in time order that starts at or after the latest trade is copied in one go.
+        """
+        count = len(columns)
+        times = columns.times
+        if count and times[0] >= max(self.latest if self.latest is not None else -math.inf, self.complete_since) \
+                and (count == 1 or not (np.diff(times) < 0).any()):
+            self._make_room(count)
+            hi = self.hi
+            self.ids[hi:hi + count] = columns.ids
+            self.prices[hi:hi + count] = columns.prices
+            self.quantities[hi:hi + count] = columns.quantities
+            self.times[hi:hi + count] = times
+            self.hi = hi + count
+            self.latest = float(times[-1])
+            return np.arange(self.base + hi, self.base + hi + count), []
+        indexes = np.empty(count, dtype=np.int64)
+        late = []
+        for k, (ticker_id, price, quantity, ts) in enumerate(zip(
+                columns.ids.tolist(), columns.prices.tolist(), columns.quantities.tolist(), times.tolist())):
+            indexes[k] = index = self.append(ticker_id, price, quantity, ts)
+            if index >= 0 and index != self.end - 1:
+                late.append(k)
+        return indexes, late
+
+    def _make_room(self, count: int):
+        if self.hi + count <= len(self.times):
+            return
+        live = self.hi - self.lo
+        if live + count <= len(self.times) // 2:
+            for column in (self.ids, self.prices, self.quantities, self.times):
+                column[:live] = column[self.lo:self.hi]
+        else:
+            size = max(2 * len(self.times), 2 * (live + count))
+            self.ids, self.prices, self.quantities, self.times = (
+                np.concatenate((c[self.lo:self.hi], np.empty(size - live, dtype=c.dtype)))
+                for c in (self.ids, self.prices, self.quantities, self.times)
+            )
+        self.base += self.lo
+        self.hi = live
+        self.lo = 0
+
+    def trim(self):
+        """Drop what is older than the retention window and, with ``keep_day``, the current day
+        (the day is given up first when more than ``max_trades`` are held)."""
+        if self.hi == self.lo or self.times[self.lo] >= self.latest - self.retain_seconds:
+            return
+        boundary = self.latest - self.retain_seconds
+        if self.keep_day:
+            boundary = min(boundary, day_start(self.latest))
+            if self.hi - self.lo > self.max_trades:
+                boundary = min(max(boundary, self.times[self.hi - self.max_trades]),
+                               self.latest - self.retain_seconds)
+        if self.times[self.lo] >= boundary:
+            return
+        self.lo += int(np.searchsorted(self.times[self.lo:self.hi], boundary, side="left"))
+        self.complete_since = max(self.complete_since, boundary)
+
+    def day_totals(self, day: date) -> Optional[List[TickerTotals]]:
+        """Per-ticker volume, mean price and trade count of ``day``, or None if the day is not complete here."""
+        first = to_epoch(datetime.combine(day, time()))
+        with self.lock:
+            if first < self.complete_since:
+                return None
+            return self._day_totals(first)
+
+    def _day_totals(self, first: float) -> List[TickerTotals]:
+        times = self.times[self.lo:self.hi]
+        lo = self.lo + int(np.searchsorted(times, first, side="left"))
+        hi = self.lo + int(np.searchsorted(times, first + 86400, side="left"))
+        ids = self.ids[lo:hi]
+        counts = np.bincount(ids, minlength=len(self.tickers))
+        volumes = np.bincount(ids, weights=self.quantities[lo:hi], minlength=len(self.tickers))
+        price_sums = np.bincount(ids, weights=self.prices[lo:hi], minlength=len(self.tickers))
+        return [TickerTotals(self.tickers[i], int(volumes[i]), float(price_sums[i] / counts[i]), int(counts[i]))
+                for i in np.flatnonzero(counts)]
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INSERT_CHUNK_SIZE = 1000
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp to naive UTC, as ``columnar_store.parse_timestamps`` does.
+
+    A value with an offset is converted to UTC (as PostgreSQL converts the
+    ``timestamptz`` psycopg2 sends), so the journal partition, rollups and
+    in-memory state use the same instant the database stores.
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_trade_payload(body: bytes) -> List[dict]:
+    """Decode a JSON array of trades, or NDJSON with one trade per line."""
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    if text[0] == "[":
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("Each trade must be a JSON object")
+    return items
+
+
+def insert_trades(session, model, rows: List[dict]) -> list:
+    """Insert ``rows`` into ``model``'s table and return transient instances with ids.
+
+    On PostgreSQL every chunk of ``INSERT_CHUNK_SIZE`` rows is one multi-row
+    ``INSERT ... RETURNING id`` statement; other dialects fall back to one
+    statement per row. The caller owns the transaction.
+    """
+    table = model.__table__
+    ids = []
+    if session.get_bind().dialect.name == "postgresql":
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + INSERT_CHUNK_SIZE]
+            ids.extend(session.execute(table.insert().values(chunk).returning(table.c.id)).scalars())
+    else:
+        for row in rows:
+            ids.append(session.execute(table.insert().values(**row)).inserted_primary_key[0])
+    return [model(id=trade_id, **row) for trade_id, row in zip(ids, rows)]
+
+
+class GroupCommitter:
+    """Merges concurrent single-trade inserts into one transaction.
+
+    ``submit`` queues a row and waits for its commit. A background task takes
+    whatever arrived within ``window_ms`` of the first queued row (up to
+    ``max_batch`` rows), inserts it with :func:`insert_trades` on ``executor``
+    (the default loop executor if None) and commits once. If that fails, each row is retried in its
+    own transaction, so only the submitters of bad rows get an error. ``before_commit(session, instances)`` runs
+    inside the transaction (e.g. to maintain rollups); ``on_commit`` receives the committed instances,
+    e.g. to append them to the local journal. ``commit_seconds`` (anything with ``observe``, such as a
+    metrics histogram) is given the duration of every commit.
+    """
+
+    def __init__(self, session_factory, model, window_ms: float = 5.0, max_batch: int = 1000,
+                 on_commit: Optional[Callable[[list], None]] = None, executor=None,
+                 before_commit: Optional[Callable[[object, list], None]] = None, commit_seconds=None):
+        self.session_factory = session_factory
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self.before_commit = before_commit
+        self.commit_seconds = commit_seconds
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, row: dict):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                trades = await loop.run_in_executor(self.executor, self._commit, [row for row, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._resolve(batch[0][1], exception=e)
+                    continue
+                # One bad row rolls back the whole group: commit each alone so only it fails
+                logger.warning(f"Group commit of {len(batch)} trades failed, committing them one by one: {e}")
+                for row, future in batch:
+                    try:
+                        trade = (await loop.run_in_executor(self.executor, self._commit, [row]))[0]
+                    except Exception as row_error:
+                        self._resolve(future, exception=row_error)
+                    else:
+                        self._resolve(future, trade)
+                continue
+            for (_, future), trade in zip(batch, trades):
+                self._resolve(future, trade)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, trade=None, exception: Optional[Exception] = None):
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(trade)
+
+    def _commit(self, rows: List[dict]) -> list:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            trades = insert_trades(db, self.model, rows)
+            if self.before_commit is not None:
+                self.before_commit(db, trades)
+            committing = time.perf_counter()
+            db.commit()
+            if self.commit_seconds is not None:
+                self.commit_seconds.observe(time.perf_counter() - committing)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        logger.debug("Group committed %d trades in %.1f ms", len(rows), (time.perf_counter() - started) * 1000)
+        if self.on_commit is not None:
+            try:
+                self.on_commit(trades)
+            except Exception as e:
+                logger.error(f"Post-commit hook failed: {e}")
+        return trades
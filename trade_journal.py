@@ -0,0 +1,162 @@
+import csv
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Iterable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on O_APPEND atomicity only
+    fcntl = None
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_COLUMNS = ["id", "ticker", "price", "quantity", "trade_type", "timestamp"]
+JOURNAL_FILENAME = "trades.csv"
+
+journal_flush_seconds = registry.histogram(
+    "trade_journal_flush_seconds", "Time to write the pending rows of a day partition to its CSV file."
+)
+
+
+def partition_path(base_dir: str, day: Union[date, datetime]) -> str:
+    return os.path.join(base_dir, day.strftime("%Y/%m/%d"), JOURNAL_FILENAME)
+
+
+class _Partition:
+    """One open day file plus the rows waiting to be written to it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.pending = io.StringIO()
+        self.writer = csv.writer(self.pending, lineterminator="\n")
+        self.pending_rows = 0
+        self.last_used = time.monotonic()
+
+    def flush(self) -> int:
+        if not self.pending_rows:
+            return 0
+        started = time.perf_counter()
+        payload = self.pending.getvalue().encode("utf-8")
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            # The header check has to happen under the lock, otherwise two
+            # workers opening a fresh partition could both write one.
+            if os.fstat(self.fd).st_size == 0:
+                payload = (",".join(JOURNAL_COLUMNS) + "\n").encode("utf-8") + payload
+            view = memoryview(payload)
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        rows = self.pending_rows
+        self.pending.seek(0)
+        self.pending.truncate()
+        self.pending_rows = 0
+        journal_flush_seconds.observe(time.perf_counter() - started)
+        return rows
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            os.close(self.fd)
+
+
+class TradeJournal:
+    """Append-only writer for the trades_data/YYYY/MM/DD/trades.csv partitions.
+
+    Rows are buffered per day partition and written with a single append
+    under an exclusive file lock once ``flush_size`` rows are pending or
+    ``flush_interval`` seconds have passed, so the cost of an insert does not
+    depend on how many trades the day already holds. At most
+    ``max_open_partitions`` file handles are kept; the least recently used
+    partition is flushed and closed when a new day is opened.
+    """
+
+    def __init__(self, base_dir: str, flush_size: int = 500, flush_interval: float = 1.0,
+                 max_open_partitions: int = 4):
+        self.base_dir = base_dir
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_open_partitions = max_open_partitions
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def _partition(self, path: str) -> _Partition:
+        partition = self._partitions.get(path)
+        if partition is None:
+            while len(self._partitions) >= self.max_open_partitions:
+                old_path, old = self._partitions.popitem(last=False)
+                old.close()
+                logger.debug(f"Rotated out journal partition: {old_path}")
+            partition = _Partition(path)
+            self._partitions[path] = partition
+        else:
+            self._partitions.move_to_end(path)
+        partition.last_used = time.monotonic()
+        return partition
+
+    def append(self, trade):
+        self.append_many([trade])
+
+    def append_many(self, trades: Iterable):
+        with self._lock:
+            for trade in trades:
+                timestamp = trade.timestamp
+                partition = self._partition(partition_path(self.base_dir, timestamp))
+                partition.writer.writerow([
+                    trade.id,
+                    trade.ticker,
+                    trade.price,
+                    trade.quantity,
+                    trade.trade_type,
+                    timestamp.isoformat(),
+                ])
+                partition.pending_rows += 1
+                if partition.pending_rows >= self.flush_size:
+                    partition.flush()
+
+    def flush(self, day: Optional[Union[date, datetime]] = None) -> int:
+        with self._lock:
+            if day is not None:
+                partition = self._partitions.get(partition_path(self.base_dir, day))
+                return partition.flush() if partition else 0
+            return sum(p.flush() for p in self._partitions.values())
+
+    def start(self):
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._run, name="trade-journal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Journal flush failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            while self._partitions:
+                _, partition = self._partitions.popitem(last=False)
+                partition.close()
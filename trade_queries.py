@@ -0,0 +1,71 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, tuple_
+from database import TradeDB
+from serialization import TRADE_FIELDS, row_encoder
+from trade_ingest import parse_timestamp
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(TRADE_FIELDS)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in TRADE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def encode_cursor(timestamp: datetime, trade_id: int) -> str:
+    return f"{timestamp.isoformat()},{trade_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ValueError("Invalid cursor ...") for anything it did not produce."""
+    try:
+        timestamp, trade_id = cursor.rsplit(",", 1)
+        decoded = parse_timestamp(timestamp), int(trade_id)
+        # trades.id is an INTEGER column: a larger id would fail in the database instead
+        if not -2 ** 31 <= decoded[1] < 2 ** 31:
+            raise ValueError(trade_id)
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid cursor {cursor!r}: pass back an X-Next-Cursor header unchanged") from None
+    return decoded
+
+
+def build_trades_query(fields: Sequence[str], ticker: Optional[str] = None, start: Optional[str] = None,
+                       end: Optional[str] = None, after: Optional[str] = None, limit: Optional[int] = None):
+    """SELECT for GET /trades ordered by (timestamp, id).
+
+    ``timestamp`` and ``id`` are always selected last so the caller can build
+    the next keyset cursor from the final row of a page. Rows without a
+    timestamp have no place in that order and are left out.
+    """
+    columns = [getattr(TradeDB, f) for f in fields] + [TradeDB.timestamp, TradeDB.id]
+    stmt = select(*columns).where(TradeDB.timestamp.isnot(None))
+    if ticker:
+        stmt = stmt.where(TradeDB.ticker == ticker)
+    if start:
+        stmt = stmt.where(TradeDB.timestamp >= parse_timestamp(start))
+    if end:
+        stmt = stmt.where(TradeDB.timestamp <= parse_timestamp(end))
+    if after:
+        stmt = stmt.where(tuple_(TradeDB.timestamp, TradeDB.id) > tuple_(*decode_cursor(after)))
+    stmt = stmt.order_by(TradeDB.timestamp, TradeDB.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def encode_csv(rows: Iterable, fields: Sequence[str], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(fields)
+    writer.writerows(map(row_encoder(fields), rows))
+    return buffer.getvalue()